@@ -1,17 +1,42 @@
 import asyncio
-import random
 import os
 import json
+import environment.rng as grng
 
 COMM_PROB = 1.0        # overwritten by runner at startup
+METRICS = None         # simulation.metrics.Metrics when the runner has --metrics
+NETWORK = None         # simulation.network.Network when the run models latency/retries
 
 
 class BaseAgent:
     PREFIX_SUBSCRIBERS = {}
+    ZONE_SUBSCRIBERS = {}  # (prefix, zone) -> agents subscribed to that prefix in a region covering the zone
+    DELIVERY_PLANS = {}    # prefix or (prefix, zone) -> (subscriber tuple, their ids), shared by all senders
 
     @classmethod
     def register_delivery_map(cls, mapping):
-        cls.PREFIX_SUBSCRIBERS = mapping or {}
+        """
+        `mapping` keys are prefixes (whole-prefix subscribers) or (prefix, zone)
+        pairs (region-scoped subscribers of keys "<prefix>@<zone>").
+        """
+        mapping = mapping or {}
+        cls.PREFIX_SUBSCRIBERS = {k: v for k, v in mapping.items() if not isinstance(k, tuple)}
+        cls.ZONE_SUBSCRIBERS = {k: v for k, v in mapping.items() if isinstance(k, tuple)}
+        cls.DELIVERY_PLANS = cls.compile_delivery_plans(cls.PREFIX_SUBSCRIBERS)
+
+    @staticmethod
+    def compile_delivery_plans(mapping):
+        """
+        One recipient tuple per prefix, shared by every sender; the sender is
+        skipped at delivery time. The map is built from the agents' own
+        slices, so every recipient is in scope.
+        """
+        return {prefix: BaseAgent._plan(subscribers) for prefix, subscribers in mapping.items()}
+
+    @staticmethod
+    def _plan(subscribers):
+        subscribers = tuple(subscribers)
+        return subscribers, frozenset(agent.agent_id for agent in subscribers)
 
     def __init__(self, agent_id, ontology_slice, logger=None, tick_rate=1):
         self.agent_id = agent_id
@@ -19,6 +44,14 @@ class BaseAgent:
         self.slice = ontology_slice
         self.logger = logger
         self.tick_rate = tick_rate
+        self._streams = {}
+
+    def stream(self, subsystem):
+        """Per-agent RNG stream for one subsystem ("delivery", "bidding", ...)."""
+        rng = self._streams.get(subsystem)
+        if rng is None:
+            rng = self._streams[subsystem] = grng.stream(self.agent_id, subsystem)
+        return rng
 
     def attach_memory(self, memory):
         self.memory = memory
@@ -26,49 +59,110 @@ class BaseAgent:
     def set_global_store(self, store):
         self.global_store = store
 
+    def unchanged(self):
+        """
+        After a successful validate_and_update: True when change-only
+        propagation is on and the value was already stored, so the caller
+        skips the global write, broadcast and log row.
+        """
+        return self.memory.CHANGE_ONLY and not self.memory.last_changed
+
     async def receive_message(self, key, value, context):
         if self.memory:
             context = context or {}
             context.setdefault('agent_id', self.agent_id)
-            await self.logger.log(context.get('tick', -1), self.agent_id, 'receive', key, value, '-', self.slice.is_in_scope(key)) if self.logger else None
+            if self.logger and self.logger.wants('receive'):
+                await self.logger.log(context.get('tick', -1), self.agent_id, 'receive', key, value, '-', self.slice.is_in_scope(key))
             self.memory.update_from_message(key, value, context)
 
     def prepare_broadcast(self, key, value, tick):
         return (key, value, {"tick": tick, "agent_id": self.agent_id})
 
     def _scoped_recipients(self, key, agents):
+        """
+        (recipients, count) for a key. A planned tuple may hold the sender
+        itself, which _deliver skips; count leaves it out.
+        """
         prefix = key.split("@")[0]
+        plan = None
+        if self.ZONE_SUBSCRIBERS:
+            scope = tuple(key.split("@", 1))
+            if scope in self.ZONE_SUBSCRIBERS:
+                plan = self._regional_plan(scope)
+        if plan is None:
+            plan = self.DELIVERY_PLANS.get(prefix)
+        if plan is not None:
+            recipients, ids = plan
+            return recipients, len(recipients) - (self.agent_id in ids)
         scoped = self.PREFIX_SUBSCRIBERS.get(prefix)
         if scoped is None:
-            return [
+            recipients = [
                 agent for agent in agents
                 if agent.agent_id != self.agent_id and agent.memory.slice.is_in_scope(key)
             ]
-        return [agent for agent in scoped if agent.agent_id != self.agent_id]
+        else:
+            recipients = [agent for agent in scoped if agent.agent_id != self.agent_id]
+        return recipients, len(recipients)
+
+    def _regional_plan(self, scope):
+        """Whole-prefix plus regional subscribers of one (prefix, zone); cached on first use."""
+        plan = self.DELIVERY_PLANS.get(scope)
+        if plan is None:
+            plan = self.DELIVERY_PLANS[scope] = self._plan(
+                (*self.PREFIX_SUBSCRIBERS.get(scope[0], ()), *self.ZONE_SUBSCRIBERS[scope]))
+        return plan
 
     async def broadcast(self, agents, key, value, tick):
         message = self.prepare_broadcast(key, value, tick)
-        recipients = self._scoped_recipients(key, agents)
+        recipients, n_candidates = self._scoped_recipients(key, agents)
+
+        if METRICS is None:
+            await self._deliver(message, recipients, n_candidates, key, value, tick)
+            return
+        with METRICS.phase("delivery", exclude=("logging",)):
+            delivered = await self._deliver(message, recipients, n_candidates, key, value, tick)
+        METRICS.count("broadcasts")
+        METRICS.count("candidates", n_candidates)
+        METRICS.count("deliveries", delivered)
+        METRICS.count("drops", n_candidates - delivered)
 
-        if self.logger:
+    async def _deliver(self, message, recipients, n_candidates, key, value, tick):
+        delivery = self.stream("delivery")
+        log_candidates = self.logger is not None and self.logger.wants('candidate')
+
+        if self.logger and self.logger.wants('fanout'):
             await self.logger.log(
                 tick,
                 self.agent_id,
                 'fanout',
                 key,
-                str(len(recipients)),
+                str(n_candidates),
                 True,
                 True
             )
 
+        # Recipients are all in scope: they come from the slice-built delivery
+        # map, or were filtered on is_in_scope when no map is registered.
+        n_delivered = 0
         for agent in recipients:
-            in_scope = agent.memory.slice.is_in_scope(key)
+            if agent is self:
+                continue
             delivered = False
-            if in_scope and random.random() < COMM_PROB:
+            if NETWORK is not None:
+                # Loss, retries and latency are drawn by the network; delayed
+                # messages arrive through NETWORK.release() in a later tick
+                delay = NETWORK.send(self, agent, message, tick, COMM_PROB)
+                if delay is not None:
+                    delivered = True
+                    n_delivered += 1
+                    if delay == 0:
+                        await agent.receive_message(*message)
+            elif delivery.random() < COMM_PROB:
                 delivered = True
+                n_delivered += 1
                 await agent.receive_message(*message)
 
-            if self.logger:
+            if log_candidates:
                 await self.logger.log(
                     tick,
                     agent.agent_id,
@@ -76,8 +170,20 @@ class BaseAgent:
                     key,
                     value,
                     str(delivered),
-                    in_scope
+                    True
                 )
 
+        if self.logger and self.logger.wants('broadcast'):
+            await self.logger.log(
+                tick,
+                self.agent_id,
+                'broadcast',
+                key,
+                f"delivered={n_delivered} dropped={n_candidates - n_delivered}",
+                True,
+                True
+            )
+        return n_delivered
+
     async def tick(self, agents, tick):
         raise NotImplementedError("Subclasses must implement their own tick behavior.")
@@ -1,26 +1,26 @@
 from agents.base_agent import BaseAgent
-import random
 import environment.world as gw
 
 
 class RelayAgent(BaseAgent):
     def __init__(self, agent_id, ontology_slice, logger=None, tick_rate=1):
         super().__init__(agent_id, ontology_slice, logger, tick_rate)
-        self.location = self.location = random.choice(gw.WORLD.zones)
+        self.location = self.stream("placement").choice(gw.WORLD.zones)
         self.covered_zones = set()
         self.claimed_zones = set()
 
-    def move_to(self, zone):
+    def move_to(self, zone, tick):
         self.location = zone
         if self.logger:
             import asyncio
-            asyncio.create_task(self.logger.log(-1, self.agent_id, "move", f"Relocate@{zone}", "moving"))
+            asyncio.create_task(self.logger.log(tick, self.agent_id, "move", f"Relocate@{zone}", "moving"))
                 # publish updated position
         c = gw.WORLD.coord(zone)
         x, y = c.x, c.y
-        if self.memory.validate_and_update(f"AgentPos@{self.agent_id}", f"{x},{y}", context={"tick": -1}):
+        if self.memory.validate_and_update(f"AgentPos@{self.agent_id}", f"{x},{y}", context={"tick": tick}) \
+                and not self.unchanged():
             if getattr(self, "global_store", None):
-                self.global_store.add(f"AgentPos@{self.agent_id}", f"{x},{y}", -1, self.agent_id)
+                self.global_store.add(f"AgentPos@{self.agent_id}", f"{x},{y}", tick, self.agent_id)
 
     def get_active_claims(self, agents):
         active_claims = {}
@@ -52,18 +52,19 @@ class RelayAgent(BaseAgent):
                 continue
 
             self.claimed_zones.add(zone)
-            self.move_to(zone)
+            self.move_to(zone, tick)
 
             relay_key = f"Relay@{zone}"
             success = self.memory.validate_and_update(
                 relay_key, "active", context={"tick": tick, "agent_id": self.agent_id}
             )
             if success:
-                self.global_store.add(relay_key, "active", tick, self.agent_id)
+                if not self.unchanged():
+                    self.global_store.add(relay_key, "active", tick, self.agent_id)
 
-                await self.broadcast(agents, relay_key, "active", tick)
-                if self.logger:
-                    await self.logger.log(tick, self.agent_id, "relay", relay_key, "active")
+                    await self.broadcast(agents, relay_key, "active", tick)
+                    if self.logger:
+                        await self.logger.log(tick, self.agent_id, "relay", relay_key, "active")
                 self.covered_zones.add(zone)
 
             self.claimed_zones.discard(zone)
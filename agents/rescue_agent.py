@@ -1,12 +1,38 @@
 from agents.base_agent import BaseAgent
 import environment.world as gw
-import random
+from memory.interning import VALUES
 
 
 class RescueAgent(BaseAgent):
+    # Bid pruning (the "bidding" block of run_mode.json); None lets every
+    # rescuer that knows of a detected zone bid on it
+    BID_K = None             # only the k rescuers nearest the zone bid
+    BID_RADIUS = None        # only rescuers within this Manhattan distance bid
+    SPATIAL_INDEX = None     # environment.world.SpatialIndex over rescuer locations, when BID_K is set
+    BIDDERS = {}             # agent id -> indexed rescuer
+
+    @classmethod
+    def configure_bidding(cls, rescuers, k=None, radius=None, cell=4):
+        """
+        Set the pruning rule and index the online `rescuers` whose slice can
+        hold bids and survivor reports; rebuilt on resume.
+        """
+        if k is not None and k < 1:
+            raise ValueError(f"bidding.k must be >= 1, got {k}")
+        cls.BID_K = k
+        cls.BID_RADIUS = radius
+        cls.SPATIAL_INDEX = None
+        cls.BIDDERS = {}
+        if k is not None:
+            cls.SPATIAL_INDEX = gw.SpatialIndex(gw.WORLD, cell)
+            for agent in rescuers:
+                if {"Bid", "Survivor"} <= set(agent.slice.allowed_prefixes):
+                    cls.BIDDERS[agent.agent_id] = agent
+                    cls.SPATIAL_INDEX.update(agent.agent_id, agent.location)
+
     def __init__(self, agent_id, ontology_slice, logger=None, tick_rate=1):
         super().__init__(agent_id, ontology_slice, logger, tick_rate)
-        self.location = random.choice(gw.WORLD.zones)
+        self.location = self.stream("placement").choice(gw.WORLD.zones)
         self.target_zones = set()
         self.rescued_zones = set()
         self.waiting_for_relay = {}
@@ -15,20 +41,41 @@ class RescueAgent(BaseAgent):
 
     def move_to(self, zone):
         self.location = zone
+        if self.SPATIAL_INDEX is not None and self.agent_id in self.SPATIAL_INDEX.location:
+            self.SPATIAL_INDEX.update(self.agent_id, zone)
+
+    def may_bid(self, zone):
+        """Whether this rescuer is among the pruned candidates for `zone`."""
+        if self.BID_RADIUS is not None and gw.manhattan(self.location, zone) > self.BID_RADIUS:
+            return False
+        if self.SPATIAL_INDEX is not None:
+            # Only rescuers that know of the detection count, so the nearest
+            # ones that cannot bid never leave a zone without bids
+            return self.agent_id in self.SPATIAL_INDEX.nearest(
+                zone, self.BID_K, lambda agent_id: self.BIDDERS[agent_id].knows_detection(zone))
+        return True
+
+    def knows_detection(self, zone):
+        """Whether this rescuer holds zone's survivor as detected and not yet rescued (no LRU touch)."""
+        state = self.memory.state
+        code = state.get(f"Survivor@{zone}")
+        return (code is not None and VALUES.decode(code) == "detected"
+                and f"Rescue@{zone}" not in state)
 
     def bid_score(self, zone):
-            return -gw.manhattan(self.location, zone) + random.uniform(0, 1e-3)
+            return -gw.manhattan(self.location, zone) + self.stream("bidding").uniform(0, 1e-3)
 
     async def tick(self, agents, tick):
         if tick % self.tick_rate != 0:
             return
 
-        zones = [k.split("@")[1] for k, v in self.memory.all_state().items()
+        state = self.memory.all_state()
+        zones = [k.split("@")[1] for k, v in state.items()
                  if k.startswith("Survivor@") and v == "detected"
-                 and f"Rescue@{k.split('@')[1]}" not in self.memory.all_state()]
+                 and f"Rescue@{k.split('@')[1]}" not in state]
 
         for zone in zones:
-            if zone not in self.target_zones and zone not in self.rescued_zones:
+            if zone not in self.target_zones and zone not in self.rescued_zones and self.may_bid(zone):
                 score = self.bid_score(zone)
                 bid_key = f"Bid@{zone}"
                 bid_val = f"{self.agent_id}:{score:.2f}"
@@ -44,7 +91,7 @@ class RescueAgent(BaseAgent):
                     self.target_zones.add(zone)
                     self.waiting_for_relay[zone] = True
 
-        for zone in list(self.target_zones):
+        for zone in sorted(self.target_zones):   # set order varies with PYTHONHASHSEED
             all_bids = [(k, v) for k, v in self.memory.all_state().items()
                         if k == f"Bid@{zone}" and ":" in v]
             highest = max(all_bids, key=lambda x: float(x[1].split(":")[1]), default=None)
@@ -69,7 +116,7 @@ class RescueAgent(BaseAgent):
                     await self.logger.log(tick, self.agent_id, "move", f"Relocate@{zone}", "moving")
 
             if zone not in self.busy_until:
-                duration = random.randint(*self.service_range)
+                duration = self.stream("service").randint(*self.service_range)
                 self.busy_until[zone] = tick + duration
                 if self.logger:
                     await self.logger.log(tick, self.agent_id,
@@ -95,10 +142,11 @@ class RescueAgent(BaseAgent):
                         del self.waiting_for_relay[zone]
                     zone_status_key = f"ZoneStatus@{zone}"
                     if self.memory.validate_and_update(zone_status_key, "unsearched", context={"tick": tick, "agent_id": self.agent_id}):
-                        self.global_store.add(zone_status_key, "unsearched",
-                                              tick, self.agent_id)
-                        await self.broadcast(agents, zone_status_key, "unsearched", tick)
-                        if self.logger:
-                            await self.logger.log(tick, self.agent_id,
-                                                  "zone_reset", zone_status_key, "unsearched")
+                        if not self.unchanged():
+                            self.global_store.add(zone_status_key, "unsearched",
+                                                  tick, self.agent_id)
+                            await self.broadcast(agents, zone_status_key, "unsearched", tick)
+                            if self.logger:
+                                await self.logger.log(tick, self.agent_id,
+                                                      "zone_reset", zone_status_key, "unsearched")
                         self.busy_until.pop(zone, None)
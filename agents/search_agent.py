@@ -1,9 +1,10 @@
 from agents.base_agent import BaseAgent
-import random
 import json
 import os
 
 class SearchAgent(BaseAgent):
+    proposal_stream = None   # shared memory.jsonl_store.JsonlWriter when outputs are streamed
+
     def __init__(self, agent_id, ontology_slice, logger=None, tick_rate=1):
         super().__init__(agent_id, ontology_slice, logger, tick_rate)
         self.location       = "Z0_0"
@@ -24,7 +25,7 @@ class SearchAgent(BaseAgent):
     def sample_survivor_status(self):
         distribution = {"detected": 0.3, "none": 0.7}
         options, weights = zip(*distribution.items())
-        chosen = random.choices(options, weights=weights, k=1)[0]
+        chosen = self.stream("proposals").choices(options, weights=weights, k=1)[0]
         return distribution, chosen
 
     async def tick(self, agents, tick):
@@ -49,28 +50,36 @@ class SearchAgent(BaseAgent):
 
         # --- Probabilistic proposal ---
         distribution, chosen = self.sample_survivor_status()
-        self.proposal_log.append({
+        proposal = {
             "tick": tick,
             "zone": zone,
             "distribution": distribution,
             "chosen": chosen
-        })
+        }
+        if self.proposal_stream is not None:
+            self.proposal_stream.append(self.agent_id, proposal)
+        else:
+            self.proposal_log.append(proposal)
 
         # Validate and update then broadcast
-        if self.memory.validate_and_update(survivor_key, chosen, context={"tick": tick, "agent_id": self.agent_id}):
+        if self.memory.validate_and_update(survivor_key, chosen, context={"tick": tick, "agent_id": self.agent_id}) \
+                and not self.unchanged():
             self.global_store.add(survivor_key, chosen, tick, self.agent_id)
 
             await self.broadcast(agents, survivor_key, chosen, tick)
             if self.logger:
                 await self.logger.log(tick, self.agent_id, "found_survivor", survivor_key, chosen)
 
-        if self.memory.validate_and_update(zone_status_key, "searched", context={"tick": tick, "agent_id": self.agent_id}):
+        if self.memory.validate_and_update(zone_status_key, "searched", context={"tick": tick, "agent_id": self.agent_id}) \
+                and not self.unchanged():
             self.global_store.add(zone_status_key, "searched", tick, self.agent_id)
             await self.broadcast(agents, zone_status_key, "searched", tick)
             if self.logger:
                 await self.logger.log(tick, self.agent_id, "zone_status", zone_status_key, "searched")
 
     def dump_proposals(self, output_dir="logs"):
+        if self.proposal_stream is not None:
+            return   # already in proposal_distributions.jsonl
         os.makedirs(output_dir, exist_ok=True)
         path = os.path.join(output_dir, f"proposals_{self.agent_id}.json")
         with open(path, "w") as f:
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the simulation core.
+
+Runs `python -m main` once per point of a matrix of agent counts, grid sizes,
+fan_out and comm_prob, and records ticks/sec, messages/sec, peak RSS and
+output bytes as JSON so runs can be compared between commits.
+
+Usage:
+    python -m bench --agents 5:10:10 --agents 20:40:40 \
+        --grid 10x10 --grid 20x20 --comm_prob 1.0 0.5 --ticks 30 \
+        --output bench_results.json
+    python -m bench --compare before.json after.json
+    python -m bench --startup --startup_budget_ms 120
+
+--agents takes N_SEARCH:N_RESCUE:N_RELAY. --startup times `python -m main
+--help` (every import the runner needs, no simulation) against a bare
+interpreter and exits non-zero when the difference exceeds the budget.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_CONFIG = "config/run_mode.json"
+STARTUP_BUDGET_MS = 120    # `python -m main` import overhead over a bare interpreter
+
+
+def parse_agents(spec):
+    try:
+        n_search, n_rescue, n_relay = (int(x) for x in spec.split(":"))
+    except ValueError:
+        raise SystemExit(f"Invalid --agents '{spec}', expected SEARCH:RESCUE:RELAY")
+    return n_search, n_rescue, n_relay
+
+
+def parse_grid(spec):
+    try:
+        width, height = (int(x) for x in spec.lower().split("x"))
+    except ValueError:
+        raise SystemExit(f"Invalid --grid '{spec}', expected WIDTHxHEIGHT")
+    return width, height
+
+
+def dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def count_messages(log_dir):
+    """(candidate deliveries attempted, delivered) from tick_metrics.csv."""
+    sent = delivered = 0
+    path = os.path.join(log_dir, "tick_metrics.csv")
+    if not os.path.exists(path):
+        return sent, delivered
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            sent += int(row["candidates"])
+            delivered += int(row["deliveries"])
+    return sent, delivered
+
+
+def run_point(point, ticks, base_cfg):
+    """Run one simulation in a scratch directory and measure it."""
+    n_search, n_rescue, n_relay = point["agents"]
+    width, height = point["grid"]
+    cfg = dict(base_cfg)
+    cfg.update({
+        "n_search": n_search, "n_rescue": n_rescue, "n_relay": n_relay,
+        "world_width": width, "world_height": height,
+        "fan_out": point["fan_out"], "comm_prob": point["comm_prob"],
+        "duration": ticks,
+    })
+
+    scratch = tempfile.mkdtemp(prefix="sar_bench_")
+    try:
+        cfg_path = os.path.join(scratch, "run_mode.json")
+        log_dir = os.path.join(scratch, "logs")
+        with open(cfg_path, "w") as f:
+            json.dump(cfg, f, indent=2)
+
+        cmd = [sys.executable, "-m", "main", "--ticks", str(ticks),
+               "--config", cfg_path, "--log_dir", log_dir, "--metrics"]
+        err_path = os.path.join(scratch, "stderr.txt")
+        with open(err_path, "w") as err:
+            start = time.perf_counter()
+            proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=err)
+            # wait4 gives this child's own peak RSS, unlike RUSAGE_CHILDREN
+            _, status, usage = os.wait4(proc.pid, 0)
+            wall = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            with open(err_path) as err:
+                raise RuntimeError(f"simulation failed for {point}:\n{err.read()}")
+
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        rss_bytes = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        sent, delivered = count_messages(log_dir)
+        result = {
+            "n_search": n_search, "n_rescue": n_rescue, "n_relay": n_relay,
+            "world_width": width, "world_height": height,
+            "fan_out": point["fan_out"], "comm_prob": point["comm_prob"],
+            "ticks": ticks,
+            "wall_s": round(wall, 3),
+            "ticks_per_s": round(ticks / wall, 3),
+            "messages": sent,
+            "delivered": delivered,
+            "messages_per_s": round(sent / wall, 1),
+            "peak_rss_mb": round(rss_bytes / 2**20, 1),
+            "output_bytes": dir_bytes(log_dir),
+        }
+        return result
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def median_ms(cmd, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def slowest_imports(n=8):
+    """Modules imported directly by main/the runner, by cumulative import time (us)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "main", "--help"],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    top = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2   # nested imports are indented
+        if depth == 1:
+            top.append((int(cumulative), name.strip()))
+    return sorted(top, reverse=True)[:n]
+
+
+def measure_startup(repeat=5):
+    """Median cold-start wall time of `python -m main --help` vs a bare interpreter."""
+    interpreter = median_ms([sys.executable, "-c", "pass"], repeat)
+    main_ms = median_ms([sys.executable, "-m", "main", "--help"], repeat)
+    return {
+        "interpreter_ms": round(interpreter, 1),
+        "main_ms": round(main_ms, 1),
+        "import_ms": round(main_ms - interpreter, 1),
+    }
+
+
+def config_key(row):
+    return (row["n_search"], row["n_rescue"], row["n_relay"],
+            row["world_width"], row["world_height"],
+            row["fan_out"], row["comm_prob"], row["ticks"])
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = {config_key(r): r for r in json.load(f)["results"]}
+    with open(after_path) as f:
+        after = {config_key(r): r for r in json.load(f)["results"]}
+
+    metrics = ["ticks_per_s", "messages_per_s", "peak_rss_mb", "output_bytes"]
+    print(f"{'config (S:R:L grid f rho T)':<34}" + "".join(f"{m:>18}" for m in metrics))
+    for key in sorted(before.keys() & after.keys()):
+        s, r, l, w, h, f, rho, t = key
+        label = f"{s}:{r}:{l} {w}x{h} {f} {rho} {t}"
+        cells = []
+        for m in metrics:
+            old, new = before[key][m], after[key][m]
+            ratio = new / old if old else float("nan")
+            cells.append(f"{new:>10} ({ratio:4.2f}x)")
+        print(f"{label:<34}" + "".join(f"{c:>18}" for c in cells))
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f"[WARN] config only in one file: {key}")
+
+    with open(before_path) as f:
+        old = json.load(f).get("startup")
+    with open(after_path) as f:
+        new = json.load(f).get("startup")
+    if old and new:
+        print(f"startup import_ms: {old['import_ms']} -> {new['import_ms']}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the simulation core.")
+    parser.add_argument("--agents", action="append", metavar="S:R:L",
+                        help="Agent counts N_SEARCH:N_RESCUE:N_RELAY (repeatable).")
+    parser.add_argument("--grid", action="append", metavar="WxH",
+                        help="Grid size (repeatable).")
+    parser.add_argument("--fan_out", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--comm_prob", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--ticks", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Runs per point; the fastest is kept.")
+    parser.add_argument("--config", default=BASE_CONFIG,
+                        help="Base config the matrix values are applied to.")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two result files instead of running.")
+    parser.add_argument("--startup", action="store_true",
+                        help="Only measure cold-start time against --startup_budget_ms.")
+    parser.add_argument("--startup_budget_ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    if args.startup:
+        startup = measure_startup(max(args.repeat, 5))
+        print(f"interpreter {startup['interpreter_ms']} ms, python -m main --help "
+              f"{startup['main_ms']} ms, imports {startup['import_ms']} ms "
+              f"(budget {args.startup_budget_ms} ms)")
+        for cumulative, name in slowest_imports():
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+        if startup["import_ms"] > args.startup_budget_ms:
+            raise SystemExit(f"[FAIL] startup over budget by "
+                             f"{startup['import_ms'] - args.startup_budget_ms:.1f} ms")
+        return
+
+    with open(args.config) as f:
+        base_cfg = json.load(f)
+
+    agents = [parse_agents(a) for a in (args.agents or ["5:10:10", "10:20:20"])]
+    grids = [parse_grid(g) for g in (args.grid or ["10x10"])]
+    points = [
+        {"agents": a, "grid": g, "fan_out": f, "comm_prob": p}
+        for a, g, f, p in itertools.product(agents, grids, args.fan_out, args.comm_prob)
+    ]
+
+    results = []
+    for i, point in enumerate(points, 1):
+        runs = [run_point(point, args.ticks, base_cfg) for _ in range(args.repeat)]
+        best = max(runs, key=lambda r: r["ticks_per_s"])
+        results.append(best)
+        print(f"[{i}/{len(points)}] agents={point['agents']} grid={point['grid']} "
+              f"f={point['fan_out']} rho={point['comm_prob']}: "
+              f"{best['ticks_per_s']} ticks/s, {best['messages_per_s']} msgs/s, "
+              f"{best['peak_rss_mb']} MB, {best['output_bytes']} B")
+
+    report = {
+        "meta": {
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "startup": measure_startup(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[✓] Benchmark results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
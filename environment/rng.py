@@ -0,0 +1,65 @@
+# environment/rng.py
+import hashlib
+import random
+
+SEED = 0   # overwritten by runner at startup
+
+
+def set_seed(seed: int) -> None:
+    global SEED
+    SEED = int(seed)
+
+
+def derive_key(seed: int, *labels) -> bytes:
+    """64-byte stream key for (seed, label, label, ...)."""
+    h = hashlib.blake2b(str(seed).encode())
+    for label in labels:
+        h.update(b"\x1f" + str(label).encode())
+    return h.digest()
+
+
+class CounterRandom(random.Random):
+    """
+    Counter-based generator: block n of a stream is blake2b(n, key=stream_key).
+    The whole state is (key, counter), so a stream never depends on what other
+    streams drew before it and can be checkpointed or skipped ahead for free.
+    All the usual helpers (choice, choices, uniform, randint, shuffle) work
+    because random.Random derives them from random() / getrandbits().
+    """
+    def __init__(self, key: bytes = b""):
+        self.key = key
+        self.counter = 0
+        super().__init__()
+
+    def seed(self, a=None, version=2):
+        # The key fixes the stream; reseeding just rewinds it.
+        self.counter = 0
+
+    def _next64(self) -> int:
+        block = hashlib.blake2b(self.counter.to_bytes(8, "little"),
+                                key=self.key, digest_size=8).digest()
+        self.counter += 1
+        return int.from_bytes(block, "little")
+
+    def random(self) -> float:
+        return (self._next64() >> 11) * (1.0 / 9007199254740992.0)
+
+    def getrandbits(self, k: int) -> int:
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        blocks = (k + 63) // 64
+        x = 0
+        for _ in range(blocks):
+            x = (x << 64) | self._next64()
+        return x >> (blocks * 64 - k)
+
+    def getstate(self):
+        return (self.key, self.counter)
+
+    def setstate(self, state):
+        self.key, self.counter = state
+
+
+def stream(*labels) -> CounterRandom:
+    """Independent stream for e.g. ("rescue4", "bidding"), derived from SEED."""
+    return CounterRandom(derive_key(SEED, *labels))
@@ -1,7 +1,7 @@
 # environment/world.py
 from dataclasses import dataclass
 from math import dist
-from typing import Dict, Tuple, List
+from typing import Callable, Dict, List, Optional, Tuple
 
 WORLD: "GridWorld | None" = None   # will be set by runner at startup
 
@@ -51,3 +51,80 @@ class GridWorld:
             z for z, c in self.zone_coord.items()
             if self.manhattan(zone, z) <= r and z != zone
         ]
+
+    def region(self, zone: str, radius: "int | None" = None, tile: "int | None" = None) -> List[str]:
+        """
+        Zones around *zone*: those within Manhattan *radius*, or those in the
+        same *tile* × *tile* block of the grid.
+        """
+        if tile:
+            c = self.coord(zone)
+            return [z for z, cz in self.zone_coord.items()
+                    if cz.x // tile == c.x // tile and cz.y // tile == c.y // tile]
+        return [zone, *self.neighbours(zone, radius or 0)]
+
+
+class SpatialIndex:
+    """
+    Bucket grid over agent locations: cells of *cell* × *cell* zones, each
+    holding the ids of the agents standing in it. nearest() scans rings of
+    cells outward from a zone and stops once no unscanned cell can hold a
+    closer agent, so a query touches O(k) agents instead of all of them.
+    """
+    def __init__(self, world: GridWorld, cell: int = 4):
+        self.world = world
+        self.cell = max(1, cell)
+        self.cells: Dict[Tuple[int, int], set] = {}
+        self.location: Dict[str, str] = {}
+        self._nearest: Dict[Tuple[str, int], List[str]] = {}   # cleared on every move
+
+    def _cell(self, zone: str) -> Tuple[int, int]:
+        c = self.world.coord(zone)
+        return c.x // self.cell, c.y // self.cell
+
+    def update(self, agent_id: str, zone: str) -> None:
+        old = self.location.get(agent_id)
+        if old == zone:
+            return
+        if old is not None:
+            self.cells[self._cell(old)].discard(agent_id)
+        self.cells.setdefault(self._cell(zone), set()).add(agent_id)
+        self.location[agent_id] = zone
+        self._nearest.clear()
+
+    def remove(self, agent_id: str) -> None:
+        zone = self.location.pop(agent_id, None)
+        if zone is not None:
+            self.cells[self._cell(zone)].discard(agent_id)
+            self._nearest.clear()
+
+    def nearest(self, zone: str, k: int, eligible: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """
+        The k agents closest to *zone* (Manhattan), ties broken by agent id.
+        With *eligible* only agents it accepts count, and the search widens
+        until k of them are found; such queries are not cached.
+        """
+        if k < 1:
+            return []
+        cached = self._nearest.get((zone, k)) if eligible is None else None
+        if cached is not None:
+            return cached
+        cx, cy = self._cell(zone)
+        max_ring = max(self.world.height, self.world.width) // self.cell + 1
+        found: List[Tuple[int, str]] = []
+        for ring in range(max_ring + 1):
+            for x in range(cx - ring, cx + ring + 1):
+                for y in range(cy - ring, cy + ring + 1):
+                    if max(abs(x - cx), abs(y - cy)) != ring:
+                        continue
+                    for agent_id in self.cells.get((x, y), ()):
+                        if eligible is None or eligible(agent_id):
+                            found.append((self.world.manhattan(zone, self.location[agent_id]), agent_id))
+            found.sort()
+            # cells beyond this ring are at least ring * cell + 1 zones away
+            if len(found) >= k and found[k - 1][0] <= ring * self.cell:
+                break
+        result = [agent_id for _, agent_id in found[:k]]
+        if eligible is None:
+            self._nearest[(zone, k)] = result
+        return result
@@ -1,36 +1,216 @@
 import os
 import csv
+import gzip
+import io
 import json
+import zlib
 from datetime import datetime
 
+from logger.reader import read_index
+
+# Per-recipient / per-message rows that aggregate mode replaces or sampling thins out
+PER_MESSAGE_EVENTS = ("fanout", "candidate", "receive")
+
+
+class LogPolicy:
+    """
+    Which rows reach update_log.csv (the "logging" block of run_mode.json).
+
+        events        event types to record; None records everything
+        exclude       event types never recorded
+        aggregate     one "broadcast" row per broadcast, value
+                      "delivered=N dropped=M", instead of a "fanout" row
+                      plus one "candidate" row per recipient
+        sample_rate   fraction of `sample_events` rows kept; rows are picked by
+                      a CRC of (tick, agent, event, key), so the same rows are
+                      kept on every run with the same seed
+    """
+    FIELDS = ("events", "exclude", "aggregate", "sample_rate", "sample_events")
+
+    def __init__(self, events=None, exclude=(), aggregate=False,
+                 sample_rate=1.0, sample_events=PER_MESSAGE_EVENTS):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"logging.sample_rate must be in [0, 1], got {sample_rate}")
+        self.events = None if events is None else frozenset(events)
+        self.exclude = frozenset(exclude)
+        self.aggregate = aggregate
+        self.sample_rate = sample_rate
+        self.sample_events = frozenset(sample_events)
+        self._threshold = int(sample_rate * 2**32)
+        self._wanted = {}
+
+    @classmethod
+    def from_config(cls, cfg):
+        unknown = set(cfg) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown logging option(s): {', '.join(sorted(unknown))}")
+        return cls(**cfg)
+
+    def wants(self, event):
+        wanted = self._wanted.get(event)
+        if wanted is None:
+            if event == "broadcast":
+                wanted = self.aggregate and event not in self.exclude
+            elif self.aggregate and event in ("fanout", "candidate"):
+                wanted = False
+            else:
+                wanted = event not in self.exclude and (self.events is None or event in self.events)
+            self._wanted[event] = wanted
+        return wanted
+
+    def keeps(self, tick, agent, event, key):
+        if self._threshold >= 2**32 or event not in self.sample_events:
+            return True
+        return zlib.crc32(f"{tick}|{agent}|{event}|{key}".encode()) < self._threshold
+
 
 class Logger:
-    def __init__(self, log_dir="logs"):
+    """
+    Buffers update_log rows and appends them in chunks of `chunk_rows` through
+    one open file handle. With compression="gzip" each chunk is its own gzip
+    member in update_log.csv.gz (the whole file still reads as one gzip
+    stream). update_log.index.jsonl gets one line per chunk with its byte
+    range, row count and tick range, so logger/reader.py can read just the
+    chunks it needs.
+
+    With output_format="jsonl" registered memory dumps are written straight
+    to memory_dumps.jsonl instead of one memory_dump_<agent>.json each.
+    """
+    HEADER = ["tick", "agent", "time", "event", "key", "value", "validated", "in_scope"]
+    INDEX_NAME = "update_log.index.jsonl"
+
+    def __init__(self, log_dir="logs", policy=None, compression=None, chunk_rows=4096,
+                 output_format="json"):
+        if compression not in (None, "gzip"):
+            raise ValueError(f"Unknown log compression: {compression}")
+        if output_format not in ("json", "jsonl"):
+            raise ValueError(f"Unknown output format: {output_format}")
         self.log_dir = os.path.abspath(log_dir)
         os.makedirs(self.log_dir, exist_ok=True)
-        self.log_path = os.path.join(self.log_dir, "update_log.csv")
+        self.compression = compression
+        self.chunk_rows = max(1, int(chunk_rows))
+        name = "update_log.csv.gz" if compression == "gzip" else "update_log.csv"
+        self.log_path = os.path.join(self.log_dir, name)
+        self.index_path = os.path.join(self.log_dir, self.INDEX_NAME)
         self.memory_dumps = []
+        self.dump_stream = None
+        if output_format == "jsonl":
+            from memory.jsonl_store import JsonlWriter
+            self.dump_stream = JsonlWriter(os.path.join(self.log_dir, "memory_dumps.jsonl"))
         self.theorem_results = []
+        self.metrics = None   # simulation.metrics.Metrics, set by the runner
+        self.policy = policy or LogPolicy()
+        self._rows = []
+        self._file = None
+
+        # Initialize CSV file; a log in the other format would be stale
+        for stale in ("update_log.csv", "update_log.csv.gz", "update_log.index.json"):
+            stale_path = os.path.join(self.log_dir, stale)
+            if stale_path != self.log_path and os.path.exists(stale_path):
+                os.remove(stale_path)
+        with open(self.log_path, "wb") as f:
+            f.write(self._encode([self.HEADER]))
+        self.header_bytes = os.path.getsize(self.log_path)
+        self.write_index([])
+
+    def __getstate__(self):
+        self.flush()
+        state = self.__dict__.copy()
+        state["_file"] = None
+        return state
 
-        # Initialize CSV file
-        with open(self.log_path, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["tick", "agent", "time", "event", "key", "value", "validated", "in_scope"])
+    def wants(self, event):
+        """Cheap pre-check so call sites can skip building rows nobody records."""
+        return self.policy.wants(event)
 
     async def log(self, tick, agent, event, key, value, validated=True, in_scope=True):
-        with open(self.log_path, "a", newline="") as csvfile:
-            timestamp = datetime.now().isoformat()
-            writer = csv.writer(csvfile)
-            writer.writerow([tick, agent, timestamp, event, key, value, validated, in_scope])
+        if not self.policy.wants(event) or not self.policy.keeps(tick, agent, event, key):
+            return
+        if self.metrics is None:
+            self._write(tick, agent, event, key, value, validated, in_scope)
+        else:
+            with self.metrics.phase("logging"):
+                self._write(tick, agent, event, key, value, validated, in_scope)
+
+    def _write(self, tick, agent, event, key, value, validated, in_scope):
+        timestamp = datetime.now().isoformat()
+        self._rows.append([tick, agent, timestamp, event, key, value, validated, in_scope])
+        if len(self._rows) >= self.chunk_rows:
+            self.flush()
+
+    def _encode(self, rows):
+        buf = io.StringIO(newline="")
+        csv.writer(buf).writerows(rows)
+        data = buf.getvalue().encode()
+        if self.compression == "gzip":
+            data = gzip.compress(data, compresslevel=6, mtime=0)
+        return data
+
+    def flush(self):
+        """Append buffered rows as one chunk and update the chunk index."""
+        if not self._rows:
+            return
+        data = self._encode(self._rows)
+        if self._file is None:
+            self._file = open(self.log_path, "ab")
+        offset = self._file.tell()
+        self._file.write(data)
+        self._file.flush()
+        ticks = [row[0] for row in self._rows if isinstance(row[0], int)]
+        chunk = [offset, len(data), len(self._rows), min(ticks, default=None), max(ticks, default=None)]
+        self._rows = []
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps(chunk) + "\n")
+
+    def write_index(self, chunks):
+        """Rewrite the chunk index: a header line, then one [offset, length, rows, min tick, max tick] line per chunk."""
+        with open(self.index_path, "w") as f:
+            f.write(json.dumps({
+                "log": os.path.basename(self.log_path),
+                "compression": self.compression,
+                "fields": self.HEADER,
+                "header_bytes": self.header_bytes,
+            }) + "\n")
+            for chunk in chunks:
+                f.write(json.dumps(chunk) + "\n")
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def offset(self):
+        """Size of the log after flushing buffered rows, recorded in checkpoints."""
+        self.flush()
+        return os.path.getsize(self.log_path)
+
+    def rewind(self, offset):
+        """Drop rows written after a checkpoint so a resumed run appends cleanly."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with open(self.log_path, "r+b") as f:
+            f.truncate(offset)
+        chunks = read_index(self.index_path)["chunks"] if os.path.exists(self.index_path) else []
+        self.write_index([c for c in chunks if c[0] + c[1] <= offset])
+        if self.dump_stream is not None:
+            self.dump_stream.rewind()
 
     def register_memory(self, agent_id, memory_dict):
-        self.memory_dumps.append((agent_id, memory_dict))
+        if self.dump_stream is not None:
+            self.dump_stream.append(agent_id, memory_dict)
+        else:
+            self.memory_dumps.append((agent_id, memory_dict))
 
     def register_theorem_result(self, result_dict):
         self.theorem_results.append(result_dict)
 
     def dump(self):
         os.makedirs(self.log_dir, exist_ok=True)
+        self.close()
+        if self.dump_stream is not None:
+            self.dump_stream.close()
 
         for agent_id, memory_dict in self.memory_dumps:
             file_path = os.path.join(self.log_dir, f"memory_dump_{agent_id}.json")
@@ -0,0 +1,157 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+LOG_NAMES = ("update_log.csv.gz", "update_log.csv")
+INDEX_NAME = "update_log.index.jsonl"
+_ABSENT = object()
+
+
+def find_log(path="logs"):
+    """update_log file inside a run directory (compressed preferred), or `path` itself."""
+    if os.path.isdir(path):
+        for name in LOG_NAMES:
+            candidate = os.path.join(path, name)
+            if os.path.exists(candidate):
+                return candidate
+        raise FileNotFoundError(f"No update_log.csv(.gz) in {path}")
+    return path
+
+
+class LogReader:
+    """
+    Chunked access to the update log written by logger.Logger, plain or gzip.
+
+        reader = LogReader("logs")
+        for rows in reader.chunks(ticks=(10, 20), events={"memory_update"}):
+            ...                                   # lists of row dicts
+        for tick, state, changed in reader.global_states():
+            ...                                   # global memory after each tick
+
+    With update_log.index.jsonl only chunks whose tick range overlaps `ticks`
+    are read and decompressed; without it (older logs) the file is streamed
+    in batches of `chunk_rows`. Either way at most one chunk is in memory.
+    """
+    def __init__(self, path="logs", chunk_rows=4096):
+        self.path = find_log(path)
+        self.compressed = self.path.endswith(".gz")
+        self.chunk_rows = chunk_rows
+        self.index = None
+        index_path = os.path.join(os.path.dirname(self.path), INDEX_NAME)
+        if os.path.exists(index_path):
+            index = read_index(index_path)
+            if index.get("log") == os.path.basename(self.path):
+                self.index = index
+
+    def _open_text(self):
+        if self.compressed:
+            return gzip.open(self.path, "rt", newline="")
+        return open(self.path, newline="")
+
+    def _indexed_chunks(self, ticks):
+        fields = self.index["fields"]
+        with open(self.path, "rb") as f:
+            for offset, length, _, lo, hi in self.index["chunks"]:
+                if ticks and lo is not None and (hi < ticks[0] or lo > ticks[1]):
+                    continue
+                f.seek(offset)
+                data = f.read(length)
+                if self.compressed:
+                    data = gzip.decompress(data)
+                yield list(csv.DictReader(io.StringIO(data.decode(), newline=""), fieldnames=fields))
+
+    def _streamed_chunks(self):
+        with self._open_text() as f:
+            batch = []
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= self.chunk_rows:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def chunks(self, ticks=None, events=None):
+        """Lists of row dicts, optionally limited to ticks=(first, last) and a set of events."""
+        source = self._indexed_chunks(ticks) if self.index else self._streamed_chunks()
+        for rows in source:
+            if ticks or events:
+                rows = [r for r in rows
+                        if (events is None or r["event"] in events)
+                        and (ticks is None or ticks[0] <= int(r["tick"]) <= ticks[1])]
+            if rows:
+                yield rows
+
+    def rows(self, ticks=None, events=None):
+        for rows in self.chunks(ticks, events):
+            yield from rows
+
+    def memory_updates(self, ticks=None):
+        """(tick, key, value) of validated memory_update rows, in log order."""
+        for row in self.rows(ticks, events={"memory_update"}):
+            if row["validated"].upper() == "TRUE":
+                yield int(row["tick"]), row["key"], row["value"]
+
+    def global_states(self):
+        """
+        (tick, state, changed) for every tick 0..last, replaying validated
+        memory_update rows as they stream in. `state` is one dict updated in
+        place (copy it to keep a tick's state); `changed` holds the keys whose
+        value differs from the previous tick. Rows are logged in tick order.
+        """
+        state = {}
+        before = {}       # key -> value before the current tick, for keys touched in it
+        tick = None
+        for row_tick, key, value in self.memory_updates():
+            if row_tick < 0:
+                continue
+            if tick is None:
+                tick = 0
+            while tick < row_tick:
+                yield tick, state, _changed(state, before)
+                before = {}
+                tick += 1
+            if key not in before:
+                before[key] = state.get(key, _ABSENT)
+            state[key] = value
+        if tick is not None:
+            yield tick, state, _changed(state, before)
+
+
+def _changed(state, before):
+    return {key for key, old in before.items() if state[key] != old}
+
+
+def read_index(path):
+    """The chunk index written by logger.Logger: a header line, then one line per chunk."""
+    index = {"chunks": []}
+    with open(path) as f:
+        for n, line in enumerate(f):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break     # a line cut short by a crash
+            if n == 0:
+                index.update(entry)
+            else:
+                index["chunks"].append(entry)
+    return index
+
+
+def tee_trace(states, path):
+    """
+    Pass the items of global_states() through while writing their states to
+    `path` as a JSON list, in the layout of json.dump(trace, f, indent=2).
+    The file is complete once the states are exhausted.
+    """
+    with open(path, "w") as f:
+        f.write("[")
+        first = True
+        for item in states:
+            f.write("\n" if first else ",\n")
+            f.write("\n".join("  " + line for line in json.dumps(item[1], indent=2).splitlines()))
+            first = False
+            yield item
+        f.write("]" if first else "\n]")
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from functools import lru_cache
+from hashlib import blake2b
+
+MASK = (1 << 64) - 1
+
+
+def _hash64(text):
+    return int.from_bytes(blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+@lru_cache(maxsize=1 << 18)
+def entry_hash(key, code):
+    """64-bit hash of one stored (key, value code) pair; digests add these mod 2**64."""
+    return _hash64(f"{key}\0{code}")
+
+
+def state_digest(state):
+    """Order-independent digest of a {key: value code} state: equal states, equal digests."""
+    return sum(entry_hash(key, code) for key, code in state.items()) & MASK
+
+
+class SliceDigests:
+    """
+    Rolling digests of one {key: value code} state per prefix and per
+    (prefix, zone), so the digest of any agent's slice projection, regional
+    or not, is a sum of a few stored numbers instead of a pass over the state.
+    It equals state_digest() of that projection.
+    """
+    def __init__(self):
+        self.prefixes = defaultdict(int)   # prefix -> digest of its keys
+        self.zones = defaultdict(int)      # (prefix, zone) -> digest of its keys
+
+    @classmethod
+    def from_state(cls, state):
+        digests = cls()
+        for key, code in state.items():
+            digests.update(key, None, code)
+        return digests
+
+    def update(self, key, old_code, new_code):
+        if old_code == new_code:
+            return
+        delta = 0 if old_code is None else -entry_hash(key, old_code)
+        if new_code is not None:
+            delta += entry_hash(key, new_code)
+        prefix, _, zone = key.partition("@")
+        self.prefixes[prefix] = (self.prefixes[prefix] + delta) & MASK
+        self.zones[prefix, zone] = (self.zones[prefix, zone] + delta) & MASK
+
+    def digest(self, prefixes, regions=None):
+        """Digest of the projection onto `prefixes` (ontology.slices.key_in_scope semantics)."""
+        total = 0
+        for prefix in prefixes:
+            zones = regions.get(prefix) if regions else None
+            if zones is None:
+                total += self.prefixes.get(prefix, 0)
+            else:
+                total += sum(self.zones.get((prefix, zone), 0) for zone in zones)
+        return total & MASK
+
+
+class DigestTree:
+    """
+    Per-prefix hash trees over one LocalMemory, kept up to date on every
+    write. A key sits at a fixed path of `depth` levels with `fanout` children
+    each, taken from the top bits of its hash, so two agents' trees line up
+    whatever keys they hold. Every node stores (sum, count) over the keys
+    below it, where sum adds 64-bit hashes of (key, value code) mod 2**64:
+    an update is a subtract/add along one path, and equal nodes mean equal
+    contents with overwhelming probability.
+
+    versions holds the tick each stored value was written at, so a sync can
+    tell which side of a difference is newer.
+    """
+    def __init__(self, fanout_bits=4, depth=4):
+        self.fanout_bits = fanout_bits
+        self.depth = depth
+        self.nodes = {}       # prefix -> [{node index: [sum, count]} for level 0..depth]
+        self.leaves = {}      # prefix -> {leaf index: set of keys}
+        self.versions = {}    # key -> tick of the stored value
+        self._paths = {}      # key -> leaf index
+
+    @classmethod
+    def from_state(cls, state, version=0, **opts):
+        tree = cls(**opts)
+        for key, code in state.items():
+            tree.update(key, None, code, version)
+        return tree
+
+    def leaf(self, key):
+        index = self._paths.get(key)
+        if index is None:
+            index = self._paths[key] = _hash64(key) >> (64 - self.fanout_bits * self.depth)
+        return index
+
+    def update(self, key, old_code, new_code, version):
+        """Replace key's value code old_code (None: absent) with new_code."""
+        self.versions[key] = version
+        if old_code == new_code:
+            return
+        prefix = key.split("@")[0]
+        levels = self.nodes.get(prefix)
+        if levels is None:
+            levels = self.nodes[prefix] = [{} for _ in range(self.depth + 1)]
+            self.leaves[prefix] = {}
+        delta = 0 if old_code is None else -entry_hash(key, old_code)
+        delta += entry_hash(key, new_code)
+        added = 1 if old_code is None else 0
+        leaf = self.leaf(key)
+        for level in range(self.depth + 1):
+            index = leaf >> (self.fanout_bits * (self.depth - level))
+            node = levels[level].get(index)
+            if node is None:
+                node = levels[level][index] = [0, 0]
+            node[0] = (node[0] + delta) & MASK
+            node[1] += added
+        if added:
+            self.leaves[prefix].setdefault(leaf, set()).add(key)
+
+    def remove(self, key, code):
+        """Drop key (stored with value code `code`) from the tree."""
+        prefix = key.split("@")[0]
+        levels = self.nodes.get(prefix)
+        self.versions.pop(key, None)
+        if levels is None:
+            return
+        delta = -entry_hash(key, code)
+        leaf = self.leaf(key)
+        for level in range(self.depth + 1):
+            index = leaf >> (self.fanout_bits * (self.depth - level))
+            node = levels[level][index]
+            node[0] = (node[0] + delta) & MASK
+            node[1] -= 1
+            if not node[1]:
+                del levels[level][index]
+        keys = self.leaves[prefix][leaf]
+        keys.discard(key)
+        if not keys:
+            del self.leaves[prefix][leaf]
+
+    def node(self, prefix, level, index):
+        levels = self.nodes.get(prefix)
+        node = levels[level].get(index) if levels else None
+        return (0, 0) if node is None else tuple(node)
+
+    def root(self, prefix):
+        return self.node(prefix, 0, 0)
+
+    def children(self, prefix, level, index):
+        """{child index: (sum, count)} of the non-empty children of a node."""
+        levels = self.nodes.get(prefix)
+        if not levels or level >= self.depth:
+            return {}
+        first = index << self.fanout_bits
+        below = levels[level + 1]
+        return {i: tuple(below[i]) for i in range(first, first + (1 << self.fanout_bits)) if i in below}
+
+    def keys(self, prefix, level, index):
+        """Keys stored below one node, found by descending its non-empty children."""
+        levels = self.nodes.get(prefix)
+        if not levels:
+            return set()
+        indices = [index] if index in levels[level] else []
+        for below in levels[level + 1:]:
+            indices = [i for first in indices for i in range(first << self.fanout_bits,
+                                                            (first + 1) << self.fanout_bits)
+                       if i in below]
+        leaves = self.leaves[prefix]
+        return {key for leaf in indices for key in leaves[leaf]}
@@ -0,0 +1,112 @@
+from collections import OrderedDict
+
+
+class EvictionPolicy:
+    """
+    Bounds on one LocalMemory (the "eviction" block of run_mode.json):
+
+        capacity     most keys an agent keeps outside pinned prefixes; the
+                     least recently used one goes first
+        ttl          ticks a key may go unwritten before it expires
+        quotas       {prefix: n} most keys an agent keeps of that prefix
+        pinned       prefixes never evicted, and not counted by capacity
+
+    "Used" means written or read through LocalMemory.get(). Each option is
+    off when None/empty, so a policy with no options never evicts.
+    """
+    FIELDS = ("capacity", "ttl", "quotas", "pinned")
+
+    def __init__(self, capacity=None, ttl=None, quotas=None, pinned=()):
+        if capacity is not None and capacity < 0:
+            raise ValueError(f"eviction.capacity must be >= 0, got {capacity}")
+        if ttl is not None and ttl < 1:
+            raise ValueError(f"eviction.ttl must be >= 1, got {ttl}")
+        self.capacity = capacity
+        self.ttl = ttl
+        self.quotas = dict(quotas or {})
+        self.pinned = frozenset(pinned)
+
+    @classmethod
+    def from_config(cls, cfg):
+        cfg = {k: v for k, v in cfg.items() if k != "enabled"}
+        unknown = set(cfg) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown eviction option(s): {', '.join(sorted(unknown))}")
+        return cls(**cfg)
+
+    def victims(self, recency, prefix):
+        """(key, reason) pairs to drop after a write of a `prefix` key."""
+        victims = []
+        quota = self.quotas.get(prefix)
+        if quota is not None:
+            while recency.count(prefix) > quota:
+                victims.append((recency.pop_lru(prefix), "quota"))
+        if self.capacity is not None:
+            while len(recency) > self.capacity:
+                victims.append((recency.pop_lru(), "lru"))
+        return victims
+
+    def expired(self, recency, tick):
+        """Keys last written more than `ttl` ticks before `tick`."""
+        if self.ttl is None:
+            return []
+        return recency.pop_written_before(tick - self.ttl)
+
+
+class KeyRecency:
+    """
+    Use order and write ticks of one memory's evictable keys. Use order is
+    kept per prefix, so the least recently used key overall is the oldest of
+    a handful of per-prefix heads and a quota victim is O(1).
+    """
+    def __init__(self):
+        self.used = {}               # prefix -> OrderedDict(key -> use sequence number)
+        self.written = OrderedDict() # key -> tick of the last write, oldest first
+        self.seq = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def count(self, prefix):
+        return len(self.used.get(prefix, ()))
+
+    def touch(self, key):
+        order = self.used.get(key.split("@")[0])
+        if order is not None and key in order:
+            self.seq += 1
+            order[key] = self.seq
+            order.move_to_end(key)
+
+    def write(self, key, tick):
+        order = self.used.setdefault(key.split("@")[0], OrderedDict())
+        if key not in order:
+            self.size += 1
+        self.seq += 1
+        order[key] = self.seq
+        order.move_to_end(key)
+        self.written[key] = tick
+        self.written.move_to_end(key)
+
+    def discard(self, key):
+        order = self.used.get(key.split("@")[0])
+        if order is not None and order.pop(key, None) is not None:
+            self.size -= 1
+        self.written.pop(key, None)
+
+    def pop_lru(self, prefix=None):
+        if prefix is None:
+            prefix = min((order[next(iter(order))], p) for p, order in self.used.items() if order)[1]
+        key = next(iter(self.used[prefix]))
+        self.discard(key)
+        return key
+
+    def pop_written_before(self, tick):
+        expired = []
+        for key, written in self.written.items():
+            if written >= tick:
+                break
+            expired.append(key)
+        for key in expired:
+            self.discard(key)
+        return expired
@@ -1,29 +1,88 @@
 import os
 import json
 from collections import defaultdict
+from memory.digest import SliceDigests
+from memory.interning import VALUES
+from memory.history import MemoryHistory
+from ontology.slices import key_in_scope, load_region_access
 
 class GlobalMemoryStore:
-    def __init__(self, ontology_access_path):
+    def __init__(self, ontology_access_path, snapshot_dir=None, snapshot_jsonl=None, **store_opts):
         with open(ontology_access_path, "r") as f:
             self.ontology_access = json.load(f)
-        self.memory = {}  # Global memory key-value store
+        self.region_access = load_region_access(os.path.dirname(ontology_access_path))
+        self.memory = {}  # Global memory: key -> value code (memory/interning.py)
         self.snapshots = defaultdict(list)  # Per-agent memory projections
+        self.history = MemoryHistory()      # Per-key (tick, value, author) versions
+        self.monitor = None                 # simulation.monitors.TheoremMonitor, set by the runner
+        self.digests = None                 # memory.digest.SliceDigests of self.memory, after track_digests()
+        if snapshot_dir:
+            # Spill projections to disk as the run proceeds instead of holding them
+            from memory.snapshot_store import SnapshotWriter
+            self.snapshots = SnapshotWriter(snapshot_dir, **store_opts)
+        elif snapshot_jsonl:
+            # Stream decoded projections to one JSON-lines file
+            from memory.jsonl_store import JsonlWriter
+            self.snapshots = JsonlWriter(snapshot_jsonl, codes=True)
 
     def add(self, key, value, tick, agent_id=None):
-        # Store the latest global value
-        self.memory[key] = value
+        # Store the latest global value; only real changes become versions
+        code = VALUES.encode(value)
+        old = self.memory.get(key)
+        if old != code:
+            self.history.record(key, code, tick, agent_id)
+            if self.digests is not None:
+                self.digests.update(key, old, code)
+        self.memory[key] = code
+        if self.monitor is not None:
+            self.monitor.on_global(key, code)
+
+    def track_digests(self):
+        """Start (or resync) rolling per-slice digests of the global memory."""
+        self.digests = SliceDigests.from_state(self.memory)
+
+    def projection_digest(self, agent_id):
+        """state_digest of agent_id's projection of the global memory, in O(prefixes)."""
+        return self.digests.digest(self.ontology_access.get(agent_id, []),
+                                   self.region_access.get(agent_id))
+
+    def get(self, key):
+        code = self.memory.get(key)
+        return None if code is None else VALUES.decode(code)
+
+    def value_at(self, key, tick):
+        return self.history.value_at(key, tick)
+
+    def changes(self, after=None, until=None):
+        return self.history.changes(after, until)
 
     def snapshot(self, agents, tick):
         # Project global memory for each agent and store it
         for agent in agents:
             allowed = self.ontology_access.get(agent.agent_id, [])
-            projected = {
-                k: v for k, v in self.memory.items()
-                if k.split("@")[0] in allowed
-            }
-            self.snapshots[agent.agent_id].append(projected)
+            regions = self.region_access.get(agent.agent_id)
+            if regions:
+                projected = {k: v for k, v in self.memory.items() if key_in_scope(k, allowed, regions)}
+            else:
+                projected = {
+                    k: v for k, v in self.memory.items()
+                    if k.split("@")[0] in allowed
+                }
+            if isinstance(self.snapshots, dict):
+                self.snapshots[agent.agent_id].append(projected)
+            else:
+                self.snapshots.append(agent.agent_id, projected)
+
+    def rewind(self):
+        if not isinstance(self.snapshots, dict):
+            self.snapshots.rewind()
 
-    def save(self, out_path="logs/global_memories.json"):
+    def save(self, out_path="logs/global_memories_canonical.json"):
+        if not isinstance(self.snapshots, dict):
+            self.snapshots.close()
+            return
         os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        decoded = {agent_id: [VALUES.decode_state(s) for s in states]
+                   for agent_id, states in self.snapshots.items()}
         with open(out_path, "w") as f:
-            json.dump(self.snapshots, f, indent=2)
+            json.dump(decoded, f, indent=2)
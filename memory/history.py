@@ -0,0 +1,103 @@
+import bisect
+import json
+from itertools import islice
+
+from memory.interning import VALUES
+
+
+class MemoryHistory:
+    """
+    Per-key version history of the global memory: (tick, value code, author)
+    for every write that changed a key's value, kept sorted by tick.
+
+        history.value_at("Survivor@Z3_7", 40)     # O(log versions of that key)
+        history.changes(after=10, until=20)       # (tick, key, value, author), tick order
+        history.trace(0, 100)                     # [state at tick 0, ..., state at tick 100]
+    """
+    def __init__(self):
+        self.versions = {}    # key -> ([ticks], [codes], [authors])
+        self.log_ticks = []   # tick of every change, sorted
+        self.log = []         # (tick, key, code, author), parallel to log_ticks
+
+    def record(self, key, code, tick, author=None):
+        if tick < 0:
+            # No tick known: the write happened now, not before the run began
+            tick = self.log_ticks[-1] if self.log_ticks else 0
+        ticks, codes, authors = self.versions.setdefault(key, ([], [], []))
+        # Writes arrive in tick order, so these inserts are appends in practice.
+        i = bisect.bisect_right(ticks, tick)
+        ticks.insert(i, tick)
+        codes.insert(i, code)
+        authors.insert(i, author)
+        j = bisect.bisect_right(self.log_ticks, tick)
+        self.log_ticks.insert(j, tick)
+        self.log.insert(j, (tick, key, code, author))
+
+    def code_at(self, key, tick):
+        entry = self.versions.get(key)
+        if not entry:
+            return None
+        i = bisect.bisect_right(entry[0], tick) - 1
+        return entry[1][i] if i >= 0 else None
+
+    def value_at(self, key, tick):
+        code = self.code_at(key, tick)
+        return None if code is None else VALUES.decode(code)
+
+    def key_history(self, key):
+        ticks, codes, authors = self.versions.get(key, ([], [], []))
+        return [(t, VALUES.decode(c), a) for t, c, a in zip(ticks, codes, authors)]
+
+    def changes(self, after=None, until=None):
+        """Changes with after < tick <= until (either bound may be None)."""
+        start = 0 if after is None else bisect.bisect_right(self.log_ticks, after)
+        stop = len(self.log) if until is None else bisect.bisect_right(self.log_ticks, until)
+        for tick, key, code, author in islice(self.log, start, stop):
+            yield tick, key, VALUES.decode(code), author
+
+    def last_tick(self):
+        return self.log_ticks[-1] if self.log_ticks else None
+
+    def state_at(self, tick, prefixes=None):
+        state = {}
+        for _, key, value, _ in self.changes(until=tick):
+            if prefixes is None or key.split("@")[0] in prefixes:
+                state[key] = value
+        return state
+
+    def trace(self, start=0, stop=None):
+        """States at ticks start..stop (inclusive), built incrementally."""
+        stop = self.last_tick() if stop is None else stop
+        if stop is None:
+            return []
+        current = self.state_at(start - 1)
+        changes = self.changes(after=start - 1, until=stop)
+        pending = next(changes, None)
+        trace = []
+        for t in range(start, stop + 1):
+            while pending is not None and pending[0] <= t:
+                current[pending[1]] = pending[2]
+                pending = next(changes, None)
+            trace.append(current.copy())
+        return trace
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({key: self.key_history(key) for key in self.versions}, f)
+
+    @classmethod
+    def load(cls, path):
+        history = cls()
+        with open(path) as f:
+            saved = json.load(f)
+        for key, versions in saved.items():
+            ticks, codes, authors = history.versions[key] = ([], [], [])
+            for tick, value, author in versions:
+                code = VALUES.encode(value)
+                ticks.append(tick)
+                codes.append(code)
+                authors.append(author)
+                history.log.append((tick, key, code, author))
+        history.log.sort(key=lambda entry: entry[0])
+        history.log_ticks = [entry[0] for entry in history.log]
+        return history
@@ -0,0 +1,30 @@
+class ValueCodes:
+    """Value <-> small integer code table. Code 0 is reserved for "absent"."""
+    def __init__(self):
+        self.values = [None]
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+    def decode_state(self, state):
+        """{key: code} -> {key: value}, for human-readable output."""
+        values = self.values
+        return {k: values[c] for k, c in state.items()}
+
+    def replace(self, other):
+        """Adopt another table's contents in place (checkpoint restore)."""
+        self.values = other.values
+        self.codes = other.codes
+
+
+# Process-wide table shared by LocalMemory, GlobalMemoryStore and the
+# snapshot tracker, so equal values compare as equal integers everywhere.
+VALUES = ValueCodes()
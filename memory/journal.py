@@ -0,0 +1,45 @@
+class UpdateJournal:
+    """
+    Fixed-capacity ring buffer of the last `capacity` updates one LocalMemory
+    accepted, as (tick, key, value code, event, agent) tuples in arrival
+    order; once full, each append overwrites the oldest record.
+
+        journal.since(20)      # records with tick >= 20, oldest first
+        journal.latest(5)      # the 5 newest records, oldest first
+        len(journal)           # records held (<= capacity)
+        journal.dropped        # records overwritten so far
+    """
+    FIELDS = ("tick", "key", "code", "event", "agent")
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError(f"journal capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self.records = [None] * capacity
+        self.head = 0      # slot the next record goes to
+        self.size = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        start = (self.head - self.size) % self.capacity
+        for i in range(self.size):
+            yield self.records[(start + i) % self.capacity]
+
+    def append(self, tick, key, code, event, agent):
+        if self.size == self.capacity:
+            self.dropped += 1
+        else:
+            self.size += 1
+        self.records[self.head] = (tick, key, code, event, agent)
+        self.head = (self.head + 1) % self.capacity
+
+    def since(self, tick):
+        return (record for record in self if record[0] >= tick)
+
+    def latest(self, n):
+        n = min(n, self.size)
+        start = (self.head - n) % self.capacity
+        return [self.records[(start + i) % self.capacity] for i in range(n)]
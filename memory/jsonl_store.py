@@ -0,0 +1,108 @@
+import json
+import os
+from collections import defaultdict
+
+from memory.interning import VALUES
+
+
+class JsonlWriter:
+    """
+    Streams per-agent records to one JSON-lines file as the run proceeds,
+    one {"agent": ..., "data": ...} object per line, in append order. With
+    codes=True the records are {key: value code} snapshots (memory/interning.py)
+    and are decoded as they are written.
+
+    Same append/rewind/close interface as snapshot_store.SnapshotWriter, so
+    the tracker and GlobalMemoryStore can use either. `offset` is the file
+    size at the last flush; checkpoints flush first, and rewind() truncates
+    back to it on resume.
+    """
+    def __init__(self, path, codes=False):
+        self.path = path
+        self.codes = codes
+        self.offset = 0
+        self._file = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        open(path, "wb").close()
+
+    def __getstate__(self):
+        self.flush()
+        state = self.__dict__.copy()
+        state["_file"] = None
+        return state
+
+    def append(self, agent_id, data):
+        if self.codes:
+            data = VALUES.decode_state(data)
+        if self._file is None:
+            self._file = open(self.path, "ab")
+        line = json.dumps({"agent": agent_id, "data": data}, separators=(",", ":"))
+        self._file.write(line.encode() + b"\n")
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+            self.offset = self._file.tell()
+
+    def rewind(self):
+        """Drop records written after the checkpoint this writer was restored from."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with open(self.path, "r+b") as f:
+            f.truncate(self.offset)
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def iter_jsonl(path):
+    """(agent, data) per line of a JsonlWriter file."""
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["agent"], record["data"]
+
+
+def read_jsonl(path):
+    """{agent: [data, ...]}, the layout of the equivalent .json artifact."""
+    grouped = defaultdict(list)
+    for agent_id, data in iter_jsonl(path):
+        grouped[agent_id].append(data)
+    return dict(grouped)
+
+
+# Snapshot artifacts and their mmap store directory under <log_dir>/snapshots/
+SNAPSHOT_DIRS = {"local_memories": "local", "global_memories_tracker": "global_tracker",
+                 "global_memories_canonical": "global_canonical"}
+
+
+def artifact_path(log_dir, stem):
+    """
+    <stem>.jsonl if the run streamed that artifact, <stem>.json if it wrote
+    it at the end, else its mmap store directory (snapshots.backend = "mmap").
+    """
+    streamed = os.path.join(log_dir, stem + ".jsonl")
+    if os.path.exists(streamed):
+        return streamed
+    path = os.path.join(log_dir, stem + ".json")
+    if stem in SNAPSHOT_DIRS and not os.path.exists(path):
+        snap_dir = os.path.join(log_dir, "snapshots", SNAPSHOT_DIRS[stem])
+        if os.path.isdir(snap_dir):
+            return snap_dir
+    return path
+
+
+def load_artifact(path):
+    """{agent: [...]} from a .jsonl stream, a .json file or an mmap snapshot directory."""
+    if os.path.isdir(path):
+        from memory.snapshot_store import SnapshotReader
+        return SnapshotReader(path).as_dict()   # decodes each state on access
+    if path.endswith(".jsonl"):
+        return read_jsonl(path)
+    with open(path) as f:
+        return json.load(f)
@@ -1,11 +1,28 @@
 
+from memory.digest import MASK, entry_hash, state_digest
+from memory.eviction import KeyRecency
+from memory.interning import VALUES
+from memory.journal import UpdateJournal
+
+
 class LocalMemory:
+    CHANGE_ONLY = False    # set by the runner: no-op updates write no log row and are not propagated
+    last_changed = False   # whether the last validated update changed the stored value
+    digest = None          # memory.digest.DigestTree, kept current when anti-entropy sync is on
+    EVICTION = None        # memory.eviction.EvictionPolicy, set by the runner when memories are bounded
+    recency = None         # memory.eviction.KeyRecency of this memory, created on its first bounded write
+    evicted = 0
+    JOURNAL_SIZE = 0       # set by the runner: > 0 keeps that many recent updates in self.journal
+    journal = None         # memory.journal.UpdateJournal, created on the first update when JOURNAL_SIZE > 0
+    rolling_digest = None  # memory.digest.state_digest of self.state, kept current after track_digest()
+
     def __init__(self, ontology_slice, logger=None, agent_id=None):
-        self.state = {}
+        self.state = {}   # key -> value code (memory/interning.py)
         self.slice = ontology_slice
         self.logger = logger
         self.agent_id = agent_id
-        self.received_updates = []
+        self.rejected = 0
+        self.monitor = None   # simulation.monitors.TheoremMonitor, set by the runner
 
     def validate_and_update(self, key, value, context=None):
         in_scope = self.slice.is_in_scope(key)
@@ -18,28 +35,100 @@ class LocalMemory:
             print(f"  is_valid_key: {self.slice.ontology.is_valid_key(key)}")
             print(f"  is_valid_value: {self.slice.ontology.is_valid_value(key, value)}")
 
-        if validated:
-            self.state[key] = value
-            self.received_updates.append((key, value, context))
+        noop = False
+        if not validated:
+            self.rejected += 1
+            self.last_changed = False
+        else:
+            code = VALUES.encode(value)
+            self.last_changed = self.state.get(key) != code
+            noop = self.CHANGE_ONLY and not self.last_changed
+            if not noop:
+                if self.monitor is not None:
+                    self.monitor.on_local(self.agent_id, key, key not in self.state)
+                if self.rolling_digest is not None:
+                    old = self.state.get(key)
+                    delta = entry_hash(key, code) - (0 if old is None else entry_hash(key, old))
+                    self.rolling_digest = (self.rolling_digest + delta) & MASK
+                if self.digest is not None:
+                    ctx = context or {}
+                    version = ctx.get("version", ctx.get("sent_tick", ctx.get("tick", -1)))
+                    self.digest.update(key, self.state.get(key), code, version)
+                self.state[key] = code
+                if self.JOURNAL_SIZE:
+                    if self.journal is None:
+                        self.journal = UpdateJournal(self.JOURNAL_SIZE)
+                    ctx = context or {}
+                    self.journal.append(ctx.get("tick", -1), key, code, event_name, ctx.get("agent_id"))
             success = True
 
-        if self.logger and context:
+        if self.logger and context and not noop and self.logger.wants(event_name):
             tick = context.get("tick", -1)
             agent = context.get("agent_id", self.agent_id)
-            import asyncio
-            if asyncio.get_event_loop().is_running():
-                asyncio.create_task(self.logger.log(tick, agent, event_name, key, value, validated, in_scope))
-            else:
-                # fallback sync log if outside async context
-                import threading
-                threading.Thread(target=self.logger.log, args=(tick, agent, event_name, key, value, validated, in_scope)).start()
+            self._log(tick, agent, event_name, key, value, validated, in_scope)
+
+        if success and not noop and self.EVICTION is not None:
+            self._admit(key, (context or {}).get("tick", -1))
 
         return success
 
+    def track_digest(self):
+        """Start (or resync) the rolling digest; O(1) per update from here on."""
+        self.rolling_digest = state_digest(self.state)
+
+    def _log(self, *row):
+        import asyncio
+        if asyncio.get_event_loop().is_running():
+            asyncio.create_task(self.logger.log(*row))
+        else:
+            # fallback sync log if outside async context
+            import threading
+            threading.Thread(target=self.logger.log, args=row).start()
+
+    # --- bounded memory (memory/eviction.py) --------------------------------
+
+    def _admit(self, key, tick):
+        prefix = key.split("@")[0]
+        if prefix in self.EVICTION.pinned:
+            return
+        if self.recency is None:
+            self.recency = KeyRecency()
+        self.recency.write(key, tick)
+        for victim, reason in self.EVICTION.victims(self.recency, prefix):
+            self._evict(victim, reason, tick)
+
+    def expire(self, tick):
+        """Drop keys whose TTL ran out by `tick`; returns how many went."""
+        if self.EVICTION is None or self.recency is None:
+            return 0
+        expired = self.EVICTION.expired(self.recency, tick)
+        for key in expired:
+            self._evict(key, "ttl", tick)
+        return len(expired)
+
+    def _evict(self, key, reason, tick):
+        code = self.state.pop(key)
+        if self.rolling_digest is not None:
+            self.rolling_digest = (self.rolling_digest - entry_hash(key, code)) & MASK
+        if self.digest is not None:
+            self.digest.remove(key, code)
+        if self.monitor is not None:
+            self.monitor.on_evict(self.agent_id, key)
+        self.evicted += 1
+        if self.logger and self.logger.wants("evict"):
+            self._log(tick, self.agent_id, "evict", key, reason, True, True)
+
     def get(self, key):
-        return self.state.get(key)
+        code = self.state.get(key)
+        if code is not None and self.recency is not None:
+            self.recency.touch(key)
+        return None if code is None else VALUES.decode(code)
 
     def all_state(self):
+        return VALUES.decode_state(self.state)
+
+    def codes(self):
+        """Copy of the raw {key: value code} state, for snapshots and comparisons."""
         return self.state.copy()
 
     def update_from_message(self, key, value, context=None):
@@ -0,0 +1,207 @@
+import json
+import os
+from glob import glob
+
+import numpy as np
+
+from memory.interning import VALUES
+
+INDEX_NAME = "index.json"
+ABSENT = 0          # code stored for keys an agent does not hold
+
+
+def _reshape_file(path, dtype, rows, old_width, new_width, chunk_rows=4096):
+    """Rewrite the first `rows` rows of a row-major file with a new row width."""
+    tmp = path + ".tmp"
+    keep = min(old_width, new_width)
+    src = np.memmap(path, dtype=dtype, mode="r", shape=(rows, old_width)) if rows else None
+    with open(tmp, "wb") as out:
+        for start in range(0, rows, chunk_rows):
+            block = np.zeros((min(chunk_rows, rows - start), new_width), dtype=dtype)
+            block[:, :keep] = src[start:start + len(block), :keep]
+            block.tofile(out)
+    del src
+    os.replace(tmp, path)
+
+
+class SnapshotWriter:
+    """
+    Spills per-agent snapshots ({key: value code}, codes from the shared
+    VALUES table) to <out_dir>/<agent>.bin as fixed-width rows (one row per
+    snapshot, one column per key) as the run proceeds. Only the rows since the last flush are held in RAM; a flush
+    happens whenever they exceed `budget_bytes`.
+
+    Columns are assigned per agent in first-seen order. When an agent's key
+    count outgrows its row width the file is rewritten at double the width.
+    """
+    def __init__(self, out_dir, dtype="int32",
+                 budget_bytes=64 << 20, initial_width=64):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        for stale in glob(os.path.join(out_dir, "*.bin")):
+            os.remove(stale)
+        self.dtype = np.dtype(dtype)
+        self.budget_bytes = budget_bytes
+        self.initial_width = initial_width
+        self.columns = {}    # agent -> {key: column}
+        self.widths = {}     # agent -> row width on disk
+        self.rows = {}       # agent -> rows flushed to disk
+        self.pending = {}    # agent -> [(columns, codes), ...] not yet on disk
+        self.pending_bytes = 0
+
+    def path(self, agent_id):
+        return os.path.join(self.out_dir, f"{agent_id}.bin")
+
+    def append(self, agent_id, state):
+        cols = self.columns.setdefault(agent_id, {})
+        idx = np.empty(len(state), dtype=np.int64)
+        for i, key in enumerate(state):
+            col = cols.get(key)
+            if col is None:
+                col = cols[key] = len(cols)
+            idx[i] = col
+        codes = np.fromiter(state.values(), dtype=self.dtype, count=len(state))
+        self.pending.setdefault(agent_id, []).append((idx, codes))
+        self.pending_bytes += idx.nbytes + codes.nbytes
+        if self.pending_bytes >= self.budget_bytes:
+            self.flush()
+
+    def flush(self):
+        for agent_id, entries in self.pending.items():
+            if not entries:
+                continue
+            rows = self.rows.get(agent_id, 0)
+            width = self.widths.get(agent_id, self.initial_width)
+            needed = len(self.columns[agent_id])
+            if needed > width:
+                new_width = max(2 * width, needed)
+                if rows:
+                    _reshape_file(self.path(agent_id), self.dtype, rows, width, new_width)
+                width = new_width
+            self.widths[agent_id] = width
+
+            block = np.zeros((len(entries), width), dtype=self.dtype)
+            for r, (idx, codes) in enumerate(entries):
+                block[r, idx] = codes
+            with open(self.path(agent_id), "ab") as f:
+                block.tofile(f)
+            self.rows[agent_id] = rows + len(entries)
+        self.pending = {}
+        self.pending_bytes = 0
+        self.write_index()
+
+    def write_index(self):
+        index = {
+            "dtype": self.dtype.str,
+            "values": VALUES.values,
+            "agents": {
+                agent_id: {
+                    "rows": self.rows.get(agent_id, 0),
+                    "width": self.widths.get(agent_id, self.initial_width),
+                    "keys": sorted(cols, key=cols.get),
+                }
+                for agent_id, cols in self.columns.items()
+            },
+        }
+        with open(os.path.join(self.out_dir, INDEX_NAME), "w") as f:
+            json.dump(index, f)
+
+    def rewind(self):
+        """
+        Bring the files back to this writer's (checkpointed) cursors: drop rows
+        flushed after the checkpoint and undo any widening that happened since.
+        """
+        on_disk = {}
+        index_path = os.path.join(self.out_dir, INDEX_NAME)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                on_disk = json.load(f)["agents"]
+        for path in glob(os.path.join(self.out_dir, "*.bin")):
+            agent_id = os.path.basename(path)[:-len(".bin")]
+            rows = self.rows.get(agent_id, 0)
+            if not rows:
+                os.remove(path)
+                continue
+            width = self.widths[agent_id]
+            disk_width = on_disk.get(agent_id, {}).get("width", width)
+            if disk_width != width:
+                _reshape_file(path, self.dtype, rows, disk_width, width)
+            else:
+                with open(path, "r+b") as f:
+                    f.truncate(rows * width * self.dtype.itemsize)
+        self.write_index()
+
+    def close(self):
+        self.flush()
+
+
+class SnapshotTrace:
+    """Read-only sequence of decoded snapshots (dicts) for one agent."""
+    def __init__(self, reader, agent_id):
+        self.reader = reader
+        self.agent_id = agent_id
+        self.keys = reader.keys(agent_id)
+        self.array = reader.states(agent_id)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __getitem__(self, t):
+        if isinstance(t, slice):
+            return [self.reader.decode(self.keys, row) for row in self.array[t]]
+        return self.reader.decode(self.keys, self.array[t])
+
+    def __iter__(self):
+        for row in self.array:
+            yield self.reader.decode(self.keys, row)
+
+
+class SnapshotReader:
+    """
+    Zero-copy access to a SnapshotWriter directory.
+
+        reader = SnapshotReader("logs/snapshots/local")
+        codes = reader.states("rescue4", 100, 200)   # np.memmap view, ticks x keys
+        reader.keys("rescue4")                       # column -> key
+        reader.values[code]                          # code -> value
+    """
+    def __init__(self, snap_dir):
+        self.snap_dir = snap_dir
+        with open(os.path.join(snap_dir, INDEX_NAME)) as f:
+            index = json.load(f)
+        self.dtype = np.dtype(index["dtype"])
+        self.values = index["values"]
+        self.meta = index["agents"]
+
+    @staticmethod
+    def is_snapshot_dir(path):
+        return os.path.isfile(os.path.join(path, INDEX_NAME))
+
+    @property
+    def agents(self):
+        return list(self.meta)
+
+    def keys(self, agent_id):
+        return self.meta[agent_id]["keys"]
+
+    def states(self, agent_id, start=None, stop=None):
+        meta = self.meta[agent_id]
+        shape = (meta["rows"], meta["width"])
+        if meta["rows"] == 0:
+            return np.zeros(shape, dtype=self.dtype)
+        array = np.memmap(os.path.join(self.snap_dir, f"{agent_id}.bin"),
+                          dtype=self.dtype, mode="r", shape=shape)
+        return array[start:stop]
+
+    def decode(self, keys, row):
+        return {keys[c]: self.values[code] for c, code in enumerate(row[:len(keys)]) if code != ABSENT}
+
+    def state(self, agent_id, t):
+        return self.decode(self.keys(agent_id), self.states(agent_id)[t])
+
+    def trace(self, agent_id):
+        return SnapshotTrace(self, agent_id)
+
+    def as_dict(self):
+        """Drop-in for json.load() of the *_memories.json files: {agent: [state, ...]}."""
+        return {agent_id: self.trace(agent_id) for agent_id in self.meta}
@@ -1,13 +1,49 @@
+import json
+import os
+
 from ontology.ontology import Ontology
 
+REGION_ACCESS = "region_access.json"
+
+
+def key_in_scope(key, prefixes, regions=None):
+    """
+    Whether `key` is in a slice of `prefixes`, where `regions` optionally
+    maps some prefixes to the zones the slice covers for them.
+    """
+    prefix, _, where = key.partition("@")
+    if prefix not in prefixes:
+        return False
+    zones = regions.get(prefix) if regions else None
+    return zones is None or where in zones
+
+
+def load_region_access(log_dir="logs"):
+    """{agent: {prefix: set of zones}} from region_access.json; {} when the run had no regions."""
+    path = os.path.join(log_dir, REGION_ACCESS)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {agent_id: {prefix: set(zones) for prefix, zones in regions.items()}
+                for agent_id, regions in json.load(f).items()}
+
+
 class OntologySlice:
-    def __init__(self, allowed_prefixes):
+    def __init__(self, allowed_prefixes, regions=None):
         self.allowed_prefixes = allowed_prefixes  # e.g., ["Survivor", "Rescue"]
+        self.regions = regions or {}              # prefix -> frozenset of zones, for region-scoped prefixes
         self.ontology = Ontology()
 
+    def with_regions(self, regions):
+        """Copy of this slice limited to `regions` ({prefix: zones}) for the prefixes it holds."""
+        scoped = {p: frozenset(zones) for p, zones in regions.items() if p in self.allowed_prefixes}
+        return OntologySlice(self.allowed_prefixes, scoped)
+
     def is_in_scope(self, key):
         base = key.split("@")[0]
-        return base in self.allowed_prefixes
+        if base not in self.allowed_prefixes:
+            return False
+        return not self.regions or base not in self.regions or key.split("@", 1)[1] in self.regions[base]
 
     def validates(self, key, value):
         return self.is_in_scope(key) and self.ontology.is_valid_key(key) and self.ontology.is_valid_value(key, value)
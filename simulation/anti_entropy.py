@@ -0,0 +1,118 @@
+from memory.digest import DigestTree
+from memory.interning import VALUES
+
+
+class AntiEntropy:
+    """
+    Periodic digest-based repair between agents that share slice prefixes
+    (the "anti_entropy" block of run_mode.json). Every `interval` ticks each
+    online agent draws one of its prefixes held by someone else, then one
+    other holder of it as its peer, and with probability comm_prob runs a
+    session:
+
+      1. exchange root digests of every shared prefix
+      2. for each differing node, exchange child digests and descend into
+         the differing children only, until a node holds at most
+         `leaf_size` keys (or is a leaf)
+      3. exchange the (version, value) entries below it; per key the newer
+         version wins and the older side takes it as a "sync" update
+
+    Each exchange counts as two messages, so a session costs
+    O(differences * depth) messages rather than a rebroadcast of the slice.
+    Keys whose versions tie are left alone, and so are keys outside either
+    agent's slice, e.g. zones beyond a region-scoped peer's region.
+    """
+    def __init__(self, interval=5, leaf_size=8, fanout_bits=4, depth=4):
+        self.interval = max(1, int(interval))
+        self.leaf_size = leaf_size
+        self.tree_opts = {"fanout_bits": fanout_bits, "depth": depth}
+        self.prefixes = {}  # agent id -> set of slice prefixes
+        self.holders = {}   # prefix -> agents whose slice allows it
+        self.shared = {}    # agent id -> its prefixes with at least one other holder
+        self.position = {}  # (prefix, agent id) -> index in holders[prefix]
+        self.stats = {"sessions": 0, "lost": 0, "messages": 0, "repaired": 0}
+
+    @classmethod
+    def from_config(cls, cfg):
+        return cls(**{k: v for k, v in cfg.items() if k != "enabled"})
+
+    def attach(self, agents):
+        """Build every agent's digest from its current memory and index prefix holders."""
+        for agent in agents:
+            if agent.memory.digest is None:
+                agent.memory.digest = DigestTree.from_state(agent.memory.state, **self.tree_opts)
+        self.prefixes = {agent.agent_id: set(agent.slice.allowed_prefixes) for agent in agents}
+        self.holders, self.position = {}, {}
+        for agent in agents:
+            for prefix in sorted(self.prefixes[agent.agent_id]):
+                holders = self.holders.setdefault(prefix, [])
+                self.position[prefix, agent.agent_id] = len(holders)
+                holders.append(agent)
+        self.shared = {
+            agent.agent_id: sorted(p for p in self.prefixes[agent.agent_id] if len(self.holders[p]) > 1)
+            for agent in agents
+        }
+
+    async def round(self, online, tick, comm_prob):
+        if tick % self.interval:
+            return
+        for agent in online:
+            shared = self.shared.get(agent.agent_id)
+            if not shared:
+                continue
+            rng = agent.stream("anti_entropy")
+            peer = self._peer(agent, rng.choice(shared), rng)
+            if rng.random() >= comm_prob:
+                self.stats["lost"] += 1
+                continue
+            await self.sync(agent, peer, tick)
+
+    def _peer(self, agent, prefix, rng):
+        """A uniformly drawn holder of prefix other than agent itself."""
+        holders = self.holders[prefix]
+        i = rng.randrange(len(holders) - 1)
+        return holders[i + (i >= self.position[prefix, agent.agent_id])]
+
+    async def sync(self, a, b, tick):
+        self.stats["sessions"] += 1
+        da, db = a.memory.digest, b.memory.digest
+        shared = sorted(self.prefixes[a.agent_id] & self.prefixes[b.agent_id])
+        self.stats["messages"] += 2
+        depth = da.depth
+        for prefix in shared:
+            pending = [(0, 0)]
+            while pending:
+                level, index = pending.pop()
+                na, nb = da.node(prefix, level, index), db.node(prefix, level, index)
+                if na == nb:
+                    continue
+                if level == depth or max(na[1], nb[1]) <= self.leaf_size:
+                    self.stats["messages"] += 2
+                    await self._reconcile(a, b, da.keys(prefix, level, index) | db.keys(prefix, level, index), tick)
+                    continue
+                self.stats["messages"] += 2
+                ca, cb = da.children(prefix, level, index), db.children(prefix, level, index)
+                pending.extend((level + 1, i) for i in sorted(set(ca) | set(cb), reverse=True)
+                               if ca.get(i) != cb.get(i))
+
+    async def _reconcile(self, a, b, keys, tick):
+        in_both = a.memory.slice.is_in_scope, b.memory.slice.is_in_scope
+        for key in sorted(keys):
+            if not (in_both[0](key) and in_both[1](key)):
+                continue
+            code_a, code_b = a.memory.state.get(key), b.memory.state.get(key)
+            if code_a == code_b:
+                continue
+            va = a.memory.digest.versions.get(key) if code_a is not None else None
+            vb = b.memory.digest.versions.get(key) if code_b is not None else None
+            if va == vb:
+                continue
+            if vb is None or (va is not None and va > vb):
+                source, target, code, version = a, b, code_a, va
+            else:
+                source, target, code, version = b, a, code_b, vb
+            if target.memory.validate_and_update(
+                    key, VALUES.decode(code),
+                    context={"tick": tick, "agent_id": target.agent_id, "event": "sync",
+                             "version": version, "source": source.agent_id}):
+                self.stats["repaired"] += 1
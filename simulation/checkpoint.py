@@ -0,0 +1,47 @@
+import glob
+import gzip
+import os
+import pickle
+import re
+
+CHECKPOINT_PATTERN = "checkpoint_*.pkl.gz"
+
+
+def checkpoint_path(checkpoint_dir, tick):
+    return os.path.join(checkpoint_dir, f"checkpoint_{tick:06d}.pkl.gz")
+
+
+def save_checkpoint(state, checkpoint_dir, keep=2):
+    """
+    Pickle the run state (agents, memories, stores, tracker, RNG streams,
+    logger offset) into a gzip-compressed file named after state["tick"].
+    The file is written to a temp name and renamed, so a crash mid-write
+    never leaves a truncated "latest" checkpoint behind.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = checkpoint_path(checkpoint_dir, state["tick"])
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wb", compresslevel=3) as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    if keep:
+        for old in list_checkpoints(checkpoint_dir)[:-keep]:
+            os.remove(old)
+    return path
+
+
+def list_checkpoints(checkpoint_dir):
+    def tick_of(path):
+        return int(re.search(r"checkpoint_(\d+)\.pkl\.gz$", path).group(1))
+    return sorted(glob.glob(os.path.join(checkpoint_dir, CHECKPOINT_PATTERN)), key=tick_of)
+
+
+def latest_checkpoint(checkpoint_dir):
+    paths = list_checkpoints(checkpoint_dir)
+    return paths[-1] if paths else None
+
+
+def load_checkpoint(path):
+    with gzip.open(path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,171 @@
+import csv
+import os
+import time
+from collections import deque
+
+PHASES = ("agents", "delivery", "logging", "tracker", "global_snapshot", "checkpoint")
+COUNTERS = ("broadcasts", "candidates", "deliveries", "drops", "rejected", "evicted",
+            "local_keys", "global_keys")
+SUMMED = ("wall_s", *(f"{p}_s" for p in PHASES), *(c for c in COUNTERS if not c.endswith("_keys")))
+
+
+class _Phase:
+    """Adds elapsed wall time to one phase, minus time other phases took meanwhile."""
+    __slots__ = ("metrics", "name", "exclude", "start", "excluded")
+
+    def __init__(self, metrics, name, exclude):
+        self.metrics = metrics
+        self.name = name
+        self.exclude = exclude
+
+    def __enter__(self):
+        times = self.metrics.times
+        self.excluded = sum(times[p] for p in self.exclude)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        times = self.metrics.times
+        times[self.name] += elapsed - (sum(times[p] for p in self.exclude) - self.excluded)
+        return False
+
+
+class Metrics:
+    """
+    Per-tick phase timings and message counters, one CSV row per tick.
+
+    Phase times are exclusive: "agents" is agent tick() time without the
+    message delivery and logging it triggers, "delivery" excludes logging.
+    Instrumented code checks for a Metrics instance before doing any work,
+    so a run without --metrics pays one attribute check per call site.
+
+    Rows go to the CSV only; in memory the instance keeps running totals of
+    the SUMMED columns, the last row and the `window` most recent rows.
+    """
+    def __init__(self, path, window=10):
+        self.path = path
+        self.ticks = 0                # rows recorded, including any before a resume
+        self.resumed_ticks = 0        # rows read back by rewind()
+        self.totals = dict.fromkeys(SUMMED, 0)
+        self.last = None
+        self.recent = deque(maxlen=window)
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.tick = None
+        self.tick_start = None
+        self._rejected_seen = 0
+        self._evicted_seen = 0
+        self._file = None
+        self._writer = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_file"] = state["_writer"] = None
+        return state
+
+    def phase(self, name, exclude=()):
+        return _Phase(self, name, exclude)
+
+    def count(self, counter, n=1):
+        self.counts[counter] += n
+
+    def offset(self):
+        """Bytes of the CSV written so far; stored in checkpoints for rewind()."""
+        return self._file.tell() if self._file else 0
+
+    def rewind(self, offset, tick, agents):
+        """
+        Resume the CSV of a checkpointed run: keep its first `offset` bytes
+        plus the row of the checkpoint `tick` (written after the checkpoint
+        was saved), drop anything later, rebuild the totals from the kept
+        rows and append from there.
+        """
+        self._rejected_seen = sum(a.memory.rejected for a in agents if a.memory)
+        self._evicted_seen = sum(a.memory.evicted for a in agents if a.memory)
+        if offset is None or not os.path.exists(self.path):
+            return
+        with open(self.path, "r+", newline="") as f:
+            fieldnames = next(csv.reader([f.readline()]), None)
+            if fieldnames is None:
+                return
+            kept = f.tell()
+            for line in iter(f.readline, ""):
+                if not line.endswith("\n"):
+                    break
+                row = self._parse(fieldnames, line)
+                if kept >= offset and row["tick"] != tick:
+                    break
+                self._record(row)
+                kept = f.tell()
+                if kept > offset:
+                    break         # the checkpoint tick's row
+            f.truncate(kept)
+        self.resumed_ticks = self.ticks
+        self._file = open(self.path, "a", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+
+    @staticmethod
+    def _parse(fieldnames, line):
+        row = dict(zip(fieldnames, next(csv.reader([line]))))
+        return {k: float(v) if k.endswith("_s") else int(v) for k, v in row.items()}
+
+    def _record(self, row):
+        self.ticks += 1
+        for column in SUMMED:
+            self.totals[column] += row[column]
+        self.last = row
+        self.recent.append(row)
+
+    def begin_tick(self, tick):
+        self.tick = tick
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self.tick_start = time.perf_counter()
+
+    def end_tick(self, agents, global_store=None):
+        wall = time.perf_counter() - self.tick_start
+        rejected = sum(a.memory.rejected for a in agents if a.memory)
+        self.counts["rejected"] = rejected - self._rejected_seen
+        self._rejected_seen = rejected
+        evicted = sum(a.memory.evicted for a in agents if a.memory)
+        self.counts["evicted"] = evicted - self._evicted_seen
+        self._evicted_seen = evicted
+        self.counts["local_keys"] = sum(len(a.memory.state) for a in agents if a.memory)
+        self.counts["global_keys"] = len(global_store.memory) if global_store else 0
+
+        row = {"tick": self.tick, "wall_s": round(wall, 6)}
+        row.update({f"{p}_s": round(t, 6) for p, t in self.times.items()})
+        row.update(self.counts)
+        self._record(row)
+
+        if self._writer is None:
+            self._file = open(self.path, "w", newline="")
+            self._writer = csv.DictWriter(self._file, fieldnames=list(row))
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = self._writer = None
+
+    def summary(self):
+        """Plain-text table of per-phase totals and counter totals."""
+        if not self.ticks:
+            return "no ticks recorded"
+        wall = self.totals["wall_s"]
+        lines = [f"{self.ticks} ticks in {wall:.3f}s ({self.ticks / max(wall, 1e-9):.2f} ticks/s)",
+                 f"{'phase':<18}{'total s':>10}{'ms/tick':>10}{'share':>8}"]
+        for p in PHASES:
+            total = self.totals[f"{p}_s"]
+            lines.append(f"{p:<18}{total:>10.3f}{1000 * total / self.ticks:>10.2f}"
+                         f"{100 * total / max(wall, 1e-9):>7.1f}%")
+        lines.append(f"{'counter':<18}{'total':>10}{'per tick':>10}")
+        for c in COUNTERS:
+            if c.endswith("_keys"):
+                lines.append(f"{c:<18}{self.last[c]:>10}{'(last)':>10}")
+            else:
+                lines.append(f"{c:<18}{self.totals[c]:>10}{self.totals[c] / self.ticks:>10.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,168 @@
+import json
+import os
+from collections import defaultdict
+
+from ontology.slices import key_in_scope
+
+
+class TheoremMonitor:
+    """
+    Online counterparts of the post-run theorem checks, fed by hooks in
+    LocalMemory.validate_and_update and GlobalMemoryStore.add:
+
+      coherence        every global write uses a prefix some agent may hold
+                       (Theorem 1, tools/theorem_analysis.py)
+      causal isolation every key that first appears in an agent's memory is
+                       in that agent's slice (Theorem 3)
+      stuttering       an agent at tick t is violated when some key it holds
+                       disagrees with the global store and keeps disagreeing
+                       past t + max_delay (Theorem 5, tools/theorem_validator.py)
+
+    Agreement is tracked as per-(agent, key) misalignment windows: a window
+    opens at the first tick end where the agent's value differs from the
+    global value and closes at the first tick end where they agree again.
+    Hooks only mark (agent, key) pairs dirty; end_tick() compares those.
+    With `region_access` ({agent: {prefix: zones}}, region_access.json) a
+    key of a region-scoped prefix outside the agent's zones also breaks
+    causal isolation. A key evicted from a bounded memory is no longer held,
+    so it counts as aligned from the tick of its eviction.
+    """
+    def __init__(self, ontology_access, max_delay=3, region_access=None):
+        self.max_delay = max_delay
+        self.allowed = {agent_id: set(prefixes) for agent_id, prefixes in ontology_access.items()}
+        self.regions = region_access or {}
+        self.all_prefixes = set().union(*self.allowed.values()) if self.allowed else set()
+        self.memories = {}                    # agent -> LocalMemory
+        self.subscribers = defaultdict(list)  # prefix -> agents whose slice holds it
+        self.global_codes = {}
+        self.tick = 0
+        self.first_tick = None
+        self.dirty_local = set()              # (agent, key)
+        self.dirty_global = set()             # key
+        self.open = {}                        # (agent, key) -> tick the window opened
+        self.violated = defaultdict(list)     # agent -> [(start, stop)) violated tick ranges
+        self.windows = []                     # closed window lengths in ticks
+        self.coherence = [0, 0]               # violations, checked
+        self.isolation = [0, 0]
+        self.evictions = 0
+
+    def attach(self, memory):
+        agent_id = memory.agent_id
+        self.memories[agent_id] = memory
+        for prefix in self.allowed.get(agent_id, ()):
+            self.subscribers[prefix].append(agent_id)
+        self.dirty_local.update((agent_id, key) for key in memory.state)
+        memory.monitor = self
+
+    def attach_store(self, global_store):
+        self.global_codes = dict(global_store.memory)
+        global_store.monitor = self
+
+    def begin_tick(self, tick):
+        self.tick = tick
+        if self.first_tick is None:
+            self.first_tick = tick
+
+    # --- hooks --------------------------------------------------------------
+
+    def on_local(self, agent_id, key, is_new):
+        if is_new:
+            self.isolation[1] += 1
+            if not key_in_scope(key, self.allowed.get(agent_id, ()), self.regions.get(agent_id)):
+                self.isolation[0] += 1
+        self.dirty_local.add((agent_id, key))
+
+    def on_evict(self, agent_id, key):
+        self.evictions += 1
+        self.dirty_local.add((agent_id, key))
+
+    def on_global(self, key, code):
+        self.coherence[1] += 1
+        if key.split("@")[0] not in self.all_prefixes:
+            self.coherence[0] += 1
+        self.global_codes[key] = code
+        self.dirty_global.add(key)
+
+    # --- per tick -----------------------------------------------------------
+
+    def end_tick(self, tick=None):
+        tick = self.tick if tick is None else tick
+        pairs = self.dirty_local
+        for key in self.dirty_global:
+            for agent_id in self.subscribers.get(key.split("@")[0], ()):
+                pairs.add((agent_id, key))
+        for pair in pairs:
+            agent_id, key = pair
+            local = self.memories[agent_id].state.get(key)
+            aligned = local is None or local == self.global_codes.get(key)
+            start = self.open.get(pair)
+            if aligned and start is not None:
+                self._close(pair, start, tick)
+            elif not aligned and start is None:
+                self.open[pair] = tick
+        self.dirty_local = set()
+        self.dirty_global = set()
+
+    def _close(self, pair, start, stop):
+        del self.open[pair]
+        self.windows.append(stop - start)
+        # ticks t in [start, stop) only match the global store after t + max_delay
+        if stop - self.max_delay > start:
+            self.violated[pair[0]].append((start, stop - self.max_delay))
+
+    # --- results ------------------------------------------------------------
+
+    def _violated_ticks(self, agent_id, last_tick):
+        ranges = list(self.violated.get(agent_id, ()))
+        # Windows still open at the end never realigned within the run, which is
+        # how the offline check treats ticks whose match would fall past the trace
+        ranges += [(start, last_tick + 1)
+                   for (a, _), start in self.open.items() if a == agent_id]
+        count, reach = 0, None
+        for start, stop in sorted(ranges):
+            if reach is not None and start < reach:
+                start = reach
+            if stop > start:
+                count += stop - start
+                reach = stop
+        return count
+
+    def results(self):
+        last_tick = self.tick
+        ticks = 0 if self.first_tick is None else last_tick - self.first_tick + 1
+        per_agent = {a: self._violated_ticks(a, last_tick) for a in self.memories}
+        violated = sum(per_agent.values())
+        total = ticks * len(self.memories)
+        windows = sorted(self.windows)
+        return {
+            "coherence": {
+                "violations": self.coherence[0], "checked": self.coherence[1],
+                "score": round(1 - self.coherence[0] / max(1, self.coherence[1]), 3),
+            },
+            "causal_isolation": {
+                "violations": self.isolation[0], "checked": self.isolation[1],
+                "score": round(1 - self.isolation[0] / max(1, self.isolation[1]), 3),
+            },
+            "stuttering_bisim": {
+                "max_delay": self.max_delay,
+                "agent_ticks": total,
+                "violations": violated,
+                "score": round(1 - violated / max(1, total), 3),
+                "worst_agents": sorted(((a, n) for a, n in per_agent.items() if n),
+                                       key=lambda item: -item[1])[:5],
+            },
+            "evictions": self.evictions,
+            "misalignment_windows": {
+                "closed": len(windows),
+                "open_at_end": len(self.open),
+                "mean_ticks": round(sum(windows) / len(windows), 3) if windows else None,
+                "p95_ticks": windows[int(0.95 * (len(windows) - 1))] if windows else None,
+                "max_ticks": windows[-1] if windows else None,
+            },
+        }
+
+    def save(self, log_dir="logs"):
+        path = os.path.join(log_dir, "theorem_monitor.json")
+        with open(path, "w") as f:
+            json.dump(self.results(), f, indent=2)
+        return path
@@ -0,0 +1,177 @@
+import math
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel keyed by tick. Level L has `slots` buckets of
+    slots**L ticks each; an item lands on the lowest level whose current
+    rotation still contains its due tick, and is cascaded one level down
+    when the clock enters its bucket. schedule() is O(levels) and advance()
+    touches each item at most once per level, so millions of in-flight
+    items cost O(1) amortized each. Items further out than slots**levels
+    ticks wait in an overflow list until the top level comes round.
+    """
+    def __init__(self, slots=64, levels=4, now=0):
+        if slots < 2 or levels < 1:
+            raise ValueError(f"timing wheel needs slots >= 2 and levels >= 1, got {slots} and {levels}")
+        self.slots = slots
+        self.levels = levels
+        self.now = now
+        self.wheels = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.overflow = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def schedule(self, due, item):
+        if due <= self.now:
+            raise ValueError(f"due tick {due} is not after the wheel's current tick {self.now}")
+        self._place(due, item)
+        self.size += 1
+
+    def _place(self, due, item):
+        span = 1
+        for wheel in self.wheels:
+            # due shares every digit above this level with now: the bucket is
+            # reached (and cascaded) before this level wraps round
+            if due // (span * self.slots) == self.now // (span * self.slots):
+                wheel[(due // span) % self.slots].append((due, item))
+                return
+            span *= self.slots
+        self.overflow.append((due, item))
+
+    def advance(self, tick):
+        """Move the clock to `tick`; returns the items due in (previous tick, tick], in due order."""
+        released = []
+        while self.now < tick:
+            self.now += 1
+            now = self.now
+            ready = []
+            if self.overflow and now % self.slots ** self.levels == 0:
+                # the top level wraps round: overflow items may fit now
+                pending, self.overflow = self.overflow, []
+                self._cascade(pending, ready)
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots ** level
+                if now % span:
+                    continue
+                bucket = self.wheels[level][(now // span) % self.slots]
+                if bucket:
+                    self.wheels[level][(now // span) % self.slots] = []
+                    self._cascade(bucket, ready)
+            bucket = self.wheels[0][now % self.slots]
+            if bucket:
+                self.wheels[0][now % self.slots] = []
+                ready.extend(bucket)
+            released.extend(item for _, item in ready)
+            self.size -= len(ready)
+        return released
+
+    def _cascade(self, entries, ready):
+        for due, item in entries:
+            if due == self.now:
+                ready.append((due, item))
+            else:
+                self._place(due, item)
+
+
+class Network:
+    """
+    Delayed, lossy message delivery between agents (the "network" block of
+    run_mode.json). Loss, retries and latency are drawn from the sender's
+    RNG streams when a message is sent:
+
+        latency      {"type": "fixed", "ticks": n}
+                     {"type": "uniform", "min": a, "max": b}
+                     {"type": "geometric", "p": q, "min": a, "max": b}
+                     (geometric: a + number of failures before a success of
+                     probability q, capped at b)
+        retries      resends after a lost attempt; each costs `retry_delay`
+                     ticks before the next attempt's latency
+        reorder      shuffle messages released in the same tick instead of
+                     delivering them in send order
+
+    A message with total delay 0 is delivered immediately, as without a
+    network; anything else waits in a TimingWheel until release(tick) at the
+    start of its arrival tick, and is received with that tick in its context.
+    With zero latency and no retries the loss draws match plain delivery.
+    """
+    LATENCY_TYPES = ("fixed", "uniform", "geometric")
+
+    def __init__(self, latency=None, retries=0, retry_delay=1, reorder=False,
+                 wheel_slots=64, wheel_levels=4, seed_stream=None):
+        latency = dict(latency or {"type": "fixed", "ticks": 0})
+        kind = latency.get("type", "fixed")
+        if kind not in self.LATENCY_TYPES:
+            raise ValueError(f"Unknown network latency type: {kind}")
+        if kind == "geometric" and not 0 < latency.get("p", 0) <= 1:
+            raise ValueError("network.latency.p must be in (0, 1]")
+        self.latency = latency
+        self.retries = max(0, int(retries))
+        self.retry_delay = max(0, int(retry_delay))
+        self.reorder = reorder
+        self.reorder_rng = seed_stream
+        self.wheel = TimingWheel(wheel_slots, wheel_levels)
+        self.seq = 0
+        self.stats = {"sent": 0, "delivered": 0, "dropped": 0, "delayed": 0,
+                      "retries": 0, "max_in_flight": 0, "max_delay": 0}
+
+    @classmethod
+    def from_config(cls, cfg, seed_stream=None):
+        cfg = {k: v for k, v in cfg.items() if k != "enabled"}
+        return cls(seed_stream=seed_stream, **cfg)
+
+    def sample_latency(self, rng):
+        kind = self.latency.get("type", "fixed")
+        if kind == "fixed":
+            return int(self.latency.get("ticks", 0))
+        if kind == "uniform":
+            return rng.randint(int(self.latency.get("min", 0)), int(self.latency.get("max", 0)))
+        low = int(self.latency.get("min", 0))
+        p = self.latency["p"]
+        extra = 0 if p >= 1 else int(math.log(1.0 - rng.random()) / math.log(1.0 - p))
+        cap = self.latency.get("max")
+        return low + extra if cap is None else min(low + extra, int(cap))
+
+    def send(self, sender, recipient, message, tick, comm_prob):
+        """
+        Ticks until `message` reaches `recipient` (0: deliver now), or None
+        when every attempt is lost. Delayed messages are queued here.
+        """
+        self.stats["sent"] += 1
+        delivery = sender.stream("delivery")
+        delay = 0
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                delay += self.retry_delay
+            if delivery.random() < comm_prob:
+                break
+        else:
+            self.stats["dropped"] += 1
+            return None
+        delay += self.sample_latency(sender.stream("latency"))
+        self.stats["delivered"] += 1
+        self.stats["max_delay"] = max(self.stats["max_delay"], delay)
+        if delay:
+            self.stats["delayed"] += 1
+            self.seq += 1
+            self.wheel.schedule(tick + delay, (self.seq, recipient, message))
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], len(self.wheel))
+        return delay
+
+    async def release(self, tick):
+        """Deliver every message due by `tick`; returns how many arrived."""
+        arrived = self.wheel.advance(tick)
+        if not arrived:
+            return 0
+        arrived.sort(key=lambda entry: entry[0])
+        if self.reorder and self.reorder_rng is not None:
+            self.reorder_rng.shuffle(arrived)
+        for _, recipient, (key, value, context) in arrived:
+            await recipient.receive_message(key, value, {**context, "tick": tick, "sent_tick": context.get("tick")})
+        return len(arrived)
+
+    def in_flight(self):
+        return len(self.wheel)
@@ -1,33 +1,59 @@
 import asyncio
 import os
 import json
+import time
 import argparse
 import math, random
 from collections import defaultdict
-from ontology.slices import OntologySlice
+from contextlib import nullcontext
+from glob import glob
+from ontology.slices import OntologySlice, REGION_ACCESS, load_region_access
 from memory.memory_store import LocalMemory
 from memory.global_memory_store import GlobalMemoryStore
+from memory.interning import VALUES
+from memory.jsonl_store import SNAPSHOT_DIRS
 from agents import base_agent
 from agents.search_agent import SearchAgent
 from agents.rescue_agent import RescueAgent
 from agents.relay_agent import RelayAgent
-from logger.logger import Logger
-from tools.theorem_validator import MemorySnapshotTracker
+from logger.logger import Logger, LogPolicy
+from simulation.metrics import Metrics
+from simulation.monitors import TheoremMonitor
+from simulation.network import Network
+from simulation.anti_entropy import AntiEntropy
+from memory.eviction import EvictionPolicy
+from simulation.status_server import StatusServer, collect_status
 from environment.world import GridWorld, set_world
+import environment.world as gw
+import environment.rng as grng
 
-cfg = json.load(open("config/run_mode.json"))
-# tracker = None
-# global_store = GlobalMemoryStore("tools/ontology_access.json")
 global_store = None   # placeholder so name exists at module scope
 tracker       = None
-GRID_W, GRID_H = cfg.get("world_w", 10), cfg.get("world_h", 10)          # tweak in config later
-WORLD = GridWorld(GRID_W, GRID_H)
-ONTO_PATH = os.path.join("logs", "ontology_access.json")
-set_world(WORLD)
-N_SEARCH = cfg.get("n_search", 10)
-N_RESCUE = cfg.get("n_rescue", 10)
-N_RELAY = cfg.get("n_relay", 40)
-TICKS = cfg.get("duration", 100)
+
+# Defaults until configure() applies a run config; importing this module
+# reads no files and builds no world.
+GRID_W = GRID_H = 10
+WORLD = None
+LOG_DIR = "logs"
+ONTO_PATH = os.path.join(LOG_DIR, "ontology_access.json")
+N_SEARCH, N_RESCUE, N_RELAY = 10, 10, 40
+TICKS = 100
+
+
+def configure(cfg, log_dir="logs"):
+    """Apply a run config to the module-level world, agent counts and paths."""
+    global GRID_W, GRID_H, WORLD, LOG_DIR, ONTO_PATH, N_SEARCH, N_RESCUE, N_RELAY, TICKS
+    GRID_W = cfg.get("world_width", cfg.get("world_w", 10))
+    GRID_H = cfg.get("world_height", cfg.get("world_h", 10))
+    WORLD = GridWorld(GRID_W, GRID_H)
+    set_world(WORLD)
+    LOG_DIR = log_dir
+    ONTO_PATH = os.path.join(LOG_DIR, "ontology_access.json")
+    N_SEARCH = cfg.get("n_search", 10)
+    N_RESCUE = cfg.get("n_rescue", 10)
+    N_RELAY = cfg.get("n_relay", 40)
+    TICKS = cfg.get("duration", 100)
+
 
 def generate_fanout_slices(fan_out: float, seed: int = 42):
     """
@@ -76,13 +102,50 @@ def generate_fanout_slices(fan_out: float, seed: int = 42):
 
 
 def build_delivery_map(agents):
+    """prefix -> subscribers, plus (prefix, zone) -> subscribers for region-scoped slices."""
     mapping = defaultdict(list)
     for agent in agents:
+        regions = getattr(agent.slice, "regions", None) or {}
         for prefix in agent.slice.allowed_prefixes:
-            mapping[prefix].append(agent)
+            if prefix in regions:
+                for zone in sorted(regions[prefix]):
+                    mapping[(prefix, zone)].append(agent)
+            else:
+                mapping[prefix].append(agent)
     return mapping
 
 
+REGION_ROLES = ("rescue", "relay")
+ZONE_PREFIXES = ("Survivor", "ZoneStatus", "Rescue", "Relay", "Bid", "ZoneCoord")
+
+
+def apply_regions(agents_by_role, region_cfg):
+    """
+    Limit the zone-keyed prefixes of each agent in `roles` to the zones
+    around its starting location (GridWorld.region); returns
+    {agent: {prefix: sorted zones}} for region_access.json.
+    """
+    roles = region_cfg.get("roles", list(REGION_ROLES))
+    unknown = set(roles) - set(REGION_ROLES)
+    if unknown:
+        raise ValueError(f"regions.roles supports {', '.join(REGION_ROLES)}; got {', '.join(sorted(unknown))}")
+    prefixes = region_cfg.get("prefixes", list(ZONE_PREFIXES))
+    radius, tile = region_cfg.get("radius", 3), region_cfg.get("tile")
+    access = {}
+    for role in roles:
+        for agent in agents_by_role[role]:
+            zones = WORLD.region(agent.location, radius=radius, tile=tile)
+            agent.slice = agent.slice.with_regions({p: zones for p in prefixes})
+            if agent.slice.regions:
+                access[agent.agent_id] = {p: sorted(z) for p, z in agent.slice.regions.items()}
+    return access
+
+
+async def _offline_tick(*args, **kwargs):
+    """tick() replacement for failed agents (module level so it pickles)."""
+    pass
+
+
 def inject_bad_update(all_agents, tick, rng=None):
     """
     Force a randomly selected agent to attempt an invalid memory update.
@@ -91,7 +154,7 @@ def inject_bad_update(all_agents, tick, rng=None):
     if not all_agents:
         return False
 
-    rng = rng or random
+    rng = rng or grng.stream("runner", "bad_update")
     agent = rng.choice(all_agents)
     invalid_prefix = rng.choice(["Forbidden", "Corrupted", "InvalidKey"])
     key = f"{invalid_prefix}@tick{tick}"
@@ -101,45 +164,12 @@ def inject_bad_update(all_agents, tick, rng=None):
     print(f"[INJECTION] {agent.agent_id} attempting invalid update {key}={value}")
     return agent.memory.validate_and_update(key, value, context=context)
 
-async def main():
+async def build_run(logger, fan_out, seed, snapshot_cfg=None, region_cfg=None):
+    """
+    Fresh-run setup: slices, agents, delivery map, stores and the
+    ZoneCoord seed facts. Returns (search_agents, rescue_agents, relay_agents).
+    """
     global global_store, tracker
-    logger = Logger(log_dir=os.path.join(os.path.dirname(__file__), "..", "logs"))
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--ticks",   type=int,   default=100)
-    parser.add_argument("--fan_out", type=float, default=None,
-                        help="Fraction of agents to share each prefix (0–1).")
-    parser.add_argument("--drop", action="store_true", default=True,
-                        help="Enable failure injection at tick 6 (default: true).")
-    parser.add_argument("--bad_interval", type=int, default=None,
-                        help="Inject a bad update every N ticks (0/None disables).")
-    parser.add_argument("--bad_ticks", type=int, nargs="*", default=None,
-                        help="Specific ticks that should receive a bad update injection.")
-    parser.add_argument("--seed", type=int, default=None,
-                        help="Override RNG seed (default from config).")
-    args = parser.parse_args()
-    cfg = json.load(open("config/run_mode.json"))
-    print(f"[DEBUG] loaded config: {cfg}")
-    fan_out = args.fan_out if args.fan_out is not None else cfg.get("fan_out", None)
-    seed    = args.seed if args.seed is not None else cfg.get("seed",  42)
-    comm_prob = cfg.get("comm_prob", 1.0) 
-    base_agent.COMM_PROB = comm_prob
-    ticks = args.ticks or TICKS
-    bad_update_cfg = cfg.get("bad_update", {})
-    cfg_interval = int(bad_update_cfg.get("interval", 0) or 0)
-    cfg_ticks = bad_update_cfg.get("ticks", [])
-    if isinstance(cfg_ticks, int):
-        cfg_ticks = [cfg_ticks]
-    elif not isinstance(cfg_ticks, (list, tuple, set)):
-        cfg_ticks = []
-    bad_update_interval = cfg_interval if args.bad_interval is None else max(0, args.bad_interval)
-    bad_update_ticks = cfg_ticks if args.bad_ticks is None else args.bad_ticks
-    bad_update_ticks = {int(t) for t in bad_update_ticks if t is not None}
-
-    #add zones from gridworld
-    
-    # Set RNG seed for reproducibility
-    random.seed(seed)
     if fan_out == 1.0:
         # correctness mode: one slice per role
         
@@ -171,6 +201,9 @@ async def main():
     relay_agents  = [RelayAgent (f"relay{i+1}", relay_slices[i],  logger)
                      for i in range(N_RELAY)]
     all_agents    = search_agents + rescue_agents + relay_agents
+    region_access = {}
+    if region_cfg and region_cfg.get("enabled"):
+        region_access = apply_regions({"rescue": rescue_agents, "relay": relay_agents}, region_cfg)
     base_agent.BaseAgent.register_delivery_map(build_delivery_map(all_agents))
     
     access_map = {
@@ -178,20 +211,46 @@ async def main():
         for agent in all_agents
 }
     
-    os.makedirs("logs", exist_ok=True)
+    os.makedirs(LOG_DIR, exist_ok=True)
     with open(ONTO_PATH, "w") as f:
         json.dump(access_map, f, indent=2)
+    # Zones of region-scoped prefixes, read next to ontology_access.json by
+    # the snapshot projections and the validators
+    region_path = os.path.join(LOG_DIR, REGION_ACCESS)
+    if region_access:
+        with open(region_path, "w") as f:
+            json.dump(region_access, f)
+    elif os.path.exists(region_path):
+        os.remove(region_path)
     
-    global_store = GlobalMemoryStore(ONTO_PATH)
-    tracker       = MemorySnapshotTracker(ONTO_PATH)
+    from tools.theorem_validator import MemorySnapshotTracker
+
+    snapshot_cfg = snapshot_cfg or {}
+    if snapshot_cfg.get("backend", "json") == "mmap":
+        store_opts = {
+            "dtype": snapshot_cfg.get("dtype", "int32"),
+            "budget_bytes": int(snapshot_cfg.get("budget_mb", 64)) << 20,
+        }
+        global_store = GlobalMemoryStore(ONTO_PATH, snapshot_dir=os.path.join(LOG_DIR, "snapshots", "global_canonical"), **store_opts)
+        tracker       = MemorySnapshotTracker(ONTO_PATH, backend="mmap", out_dir=LOG_DIR, **store_opts)
+    elif snapshot_cfg.get("backend", "json") == "none":
+        # Online monitors only: no per-tick snapshots are kept or written
+        global_store = GlobalMemoryStore(ONTO_PATH)
+        tracker       = None
+    elif snapshot_cfg.get("backend", "json") == "jsonl":
+        # Snapshots go to logs/*.jsonl tick by tick instead of one JSON dump at the end
+        global_store = GlobalMemoryStore(ONTO_PATH, snapshot_jsonl=os.path.join(LOG_DIR, "global_memories_canonical.jsonl"))
+        tracker       = MemorySnapshotTracker(ONTO_PATH, backend="jsonl", out_dir=LOG_DIR)
+    else:
+        global_store = GlobalMemoryStore(ONTO_PATH)
+        tracker       = MemorySnapshotTracker(ONTO_PATH)
     
 
     # Zones to cover
     zone_list = WORLD.zones.copy()
-    random.shuffle(zone_list)
+    grng.stream("runner", "zones").shuffle(zone_list)
 
     # Attach memory
-    all_agents = search_agents + rescue_agents + relay_agents
     for agent in all_agents:
         agent.attach_memory(LocalMemory(agent.slice, logger, agent_id=agent.agent_id))
         agent.set_global_store(global_store)
@@ -215,71 +274,414 @@ async def main():
         assigned = zone_list[i*zones_per_agent : (i+1)*zones_per_agent]
         agent.assign_zones(assigned)
 
-    for tick in range(1, ticks + 1):
-        print(f"\n--- TICK {tick} ---")
-        if tick == 6:
-            print("Simulating failure: rescue2 and relay1 disabled.")
-            for agent in rescue_agents + relay_agents:
-                if agent.agent_id in {"rescue2", "relay1"}:
-                    async def noop(*args, **kwargs):
-                        pass
-                    agent.tick = noop  # Disable the agent
-                    if agent.logger:
-                        await agent.logger.log(tick, agent.agent_id, "failure", "status", "agent_offline", validated=False, in_scope=True)
-
-        should_inject_bad = False
-        if bad_update_interval and bad_update_interval > 0 and tick % bad_update_interval == 0:
-            should_inject_bad = True
-        if tick in bad_update_ticks:
-            should_inject_bad = True
-        if should_inject_bad:
-            inject_bad_update(all_agents, tick, rng=random)
-
-        await asyncio.gather(*(agent.tick(all_agents, tick) for agent in all_agents))
-        # Snapshot memory after all updates
-        combined_global = {}
-        for a in all_agents:
-            combined_global.update(a.memory.all_state())
-        tracker.snapshot(all_agents, combined_global)
-        global_store.snapshot(all_agents, tick)
+    return search_agents, rescue_agents, relay_agents
 
-    for agent in all_agents:
-        agent.tick = lambda *_: None  # disable behavior
 
-    for flush_tick in range(1, 11):
-        print(f"\n--- FLUSH TICK {flush_tick} ---")
-        # no new updates — just snapshot
-        combined_global = {}
-        for a in all_agents:
-            combined_global.update(a.memory.all_state())
-        tracker.snapshot(all_agents, combined_global)
-        global_store.snapshot(all_agents, flush_tick)
+def _no_phase(name, exclude=()):
+    return nullcontext()
 
 
+# Artifacts written as <stem>.json, or streamed as <stem>.jsonl with output.format = "jsonl"
+STREAMED_OUTPUTS = ("local_memories", "global_memories_tracker", "global_memories_canonical",
+                    "proposal_distributions", "memory_dumps")
 
-    for agent in all_agents:
-        if agent.memory:
-            logger.register_memory(agent.agent_id, agent.memory.all_state())
 
-    # Step: Generate ontology_access.json for evaluation
-    ontology_access = {
-        agent.agent_id: list(agent.slice.allowed_prefixes)
-        for agent in all_agents
-    }
-    with open(os.path.join(logger.log_dir, "ontology_access.json"), "w") as f:
-        json.dump(ontology_access, f, indent=2)
-
-    global_store.save("logs/global_memories_canonical.json")
-    # Save true final global memory (used by convergence checker)
-    # with open("logs/memory_dump_global.json", "w") as f:
-    #     json.dump(global_store.memory, f, indent=2)
-    combined_global = global_store.memory
-    tracker.snapshot(all_agents, combined_global)
-
-    logger.dump()
-    tracker.save("logs")
-    for agent in search_agents:
-        agent.dump_proposals("logs")
+def clear_stale_outputs(output_format, snapshot_backend="json"):
+    """Remove outputs of the other format left by an earlier run in LOG_DIR."""
+    stale_ext = ".json" if output_format == "jsonl" else ".jsonl"
+    paths = [os.path.join(LOG_DIR, stem + stale_ext) for stem in STREAMED_OUTPUTS]
+    if snapshot_backend == "mmap":
+        # the tools would read these before logs/snapshots/
+        paths += [os.path.join(LOG_DIR, stem + ext) for stem in SNAPSHOT_DIRS for ext in (".json", ".jsonl")]
+    if output_format == "jsonl":
+        paths += glob(os.path.join(LOG_DIR, "proposals_*.json"))
+        paths += glob(os.path.join(LOG_DIR, "memory_dump_*.json"))
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def flush_converged(agents, global_store, network=None):
+    """
+    Whether the flush phase can stop: no message is left in flight and every
+    agent's memory matches its projection of the global memory, compared by
+    rolling digests in O(prefixes) per agent.
+    """
+    if network is not None and network.in_flight():
+        return False
+    return all(agent.memory.rolling_digest == global_store.projection_digest(agent.agent_id)
+               for agent in agents)
+
+
+async def main():
+    global global_store, tracker
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks",   type=int,   default=100)
+    parser.add_argument("--fan_out", type=float, default=None,
+                        help="Fraction of agents to share each prefix (0–1).")
+    parser.add_argument("--drop", action="store_true", default=True,
+                        help="Enable failure injection at tick 6 (default: true).")
+    parser.add_argument("--bad_interval", type=int, default=None,
+                        help="Inject a bad update every N ticks (0/None disables).")
+    parser.add_argument("--bad_ticks", type=int, nargs="*", default=None,
+                        help="Specific ticks that should receive a bad update injection.")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Override RNG seed (default from config).")
+    parser.add_argument("--checkpoint_every", type=int, default=None,
+                        help="Write a checkpoint every N ticks (0 disables).")
+    parser.add_argument("--checkpoint_dir", default=None,
+                        help="Checkpoint directory (default: logs/checkpoints).")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None,
+                        help="Resume from a checkpoint file, or the latest one in --checkpoint_dir.")
+    parser.add_argument("--snapshot_backend", choices=["json", "mmap", "none"], default=None,
+                        help="Keep per-tick snapshots in RAM (json), spill them to logs/snapshots (mmap), "
+                             "or keep none (use with --monitors).")
+    parser.add_argument("--config", default="config/run_mode.json",
+                        help="Run config file (default: config/run_mode.json).")
+    parser.add_argument("--log_dir", default="logs",
+                        help="Directory for all run outputs (default: logs).")
+    parser.add_argument("--metrics", action="store_true", default=None,
+                        help="Write per-tick phase timings and message counters to logs/tick_metrics.csv.")
+    parser.add_argument("--metrics_summary", action="store_true", default=None,
+                        help="Print a phase/counter summary table at the end of the run (implies --metrics).")
+    parser.add_argument("--log_compression", choices=["none", "gzip"], default=None,
+                        help="Write update_log.csv (none) or gzip-chunked update_log.csv.gz.")
+    parser.add_argument("--monitors", action="store_true", default=None,
+                        help="Check the theorems online and write logs/theorem_monitor.json.")
+    parser.add_argument("--change_only", action="store_true", default=None,
+                        help="Skip global writes, broadcasts and log rows for updates that do not change a value.")
+    parser.add_argument("--anti_entropy", action="store_true", default=None,
+                        help="Periodically repair differing keys between agents through digest exchange.")
+    parser.add_argument("--journal", type=int, default=None, metavar="N",
+                        help="Keep each agent's last N accepted updates in memory.journal (0: no journal).")
+    parser.add_argument("--early_flush_stop", action="store_true", default=None,
+                        help="End the flush phase once nothing is in flight and every online agent's memory "
+                             "digest matches its projection of the global memory.")
+    parser.add_argument("--eviction", action="store_true", default=None,
+                        help="Bound every agent's local memory (\"eviction\" config block: capacity, ttl, quotas, pinned).")
+    parser.add_argument("--network", action="store_true", default=None,
+                        help="Deliver messages through the delayed network model (\"network\" config block).")
+    parser.add_argument("--status_port", type=int, default=None, metavar="PORT",
+                        help="Serve live run status as JSON at http://127.0.0.1:PORT/status (implies --metrics).")
+    parser.add_argument("--status_socket", default=None, metavar="PATH",
+                        help="Serve live run status on this Unix socket instead of a TCP port.")
+    parser.add_argument("--output_format", choices=["json", "jsonl"], default=None,
+                        help="Write snapshots, proposals and memory dumps as JSON at the end of the run, "
+                             "or stream them tick by tick to one .jsonl file per artifact.")
+    args = parser.parse_args()
+    cfg = json.load(open(args.config))
+    configure(cfg, args.log_dir)
+    print(f"[DEBUG] loaded config: {cfg}")
+    fan_out = args.fan_out if args.fan_out is not None else cfg.get("fan_out", None)
+    seed    = args.seed if args.seed is not None else cfg.get("seed",  42)
+    comm_prob = cfg.get("comm_prob", 1.0) 
+    base_agent.COMM_PROB = comm_prob
+    ticks = args.ticks or TICKS
+    bad_update_cfg = cfg.get("bad_update", {})
+    cfg_interval = int(bad_update_cfg.get("interval", 0) or 0)
+    cfg_ticks = bad_update_cfg.get("ticks", [])
+    if isinstance(cfg_ticks, int):
+        cfg_ticks = [cfg_ticks]
+    elif not isinstance(cfg_ticks, (list, tuple, set)):
+        cfg_ticks = []
+    bad_update_interval = cfg_interval if args.bad_interval is None else max(0, args.bad_interval)
+    bad_update_ticks = cfg_ticks if args.bad_ticks is None else args.bad_ticks
+    bad_update_ticks = {int(t) for t in bad_update_ticks if t is not None}
+    checkpoint_cfg = cfg.get("checkpoint", {})
+    checkpoint_every = checkpoint_cfg.get("every", 0) if args.checkpoint_every is None else args.checkpoint_every
+    checkpoint_dir = args.checkpoint_dir or checkpoint_cfg.get("dir") or os.path.join(LOG_DIR, "checkpoints")
+    snapshot_cfg = dict(cfg.get("snapshots", {}))
+    if args.snapshot_backend:
+        snapshot_cfg["backend"] = args.snapshot_backend
+    output_format = args.output_format or cfg.get("output", {}).get("format", "json")
+    if output_format == "jsonl" and snapshot_cfg.get("backend", "json") == "json":
+        snapshot_cfg["backend"] = "jsonl"
+    status_cfg = dict(cfg.get("status_server", {}))
+    if args.status_port is not None:
+        status_cfg["port"] = args.status_port
+    if args.status_socket:
+        status_cfg["unix_socket"] = args.status_socket
+    status_enabled = (status_cfg.get("enabled", False) or args.status_port is not None
+                      or bool(args.status_socket))
+    metrics_cfg = cfg.get("metrics", {})
+    metrics_summary = metrics_cfg.get("summary", False) if args.metrics_summary is None else args.metrics_summary
+    metrics_enabled = metrics_summary or status_enabled or (
+        metrics_cfg.get("enabled", False) if args.metrics is None else args.metrics)
+    metrics = Metrics(os.path.join(LOG_DIR, "tick_metrics.csv")) if metrics_enabled else None
+    base_agent.METRICS = metrics
+    phase = metrics.phase if metrics else _no_phase
+    monitor_cfg = cfg.get("monitors", {})
+    monitors_enabled = monitor_cfg.get("enabled", False) if args.monitors is None else args.monitors
+    bidding_cfg = cfg.get("bidding", {})
+    region_cfg = cfg.get("regions", {})
+    propagation_cfg = cfg.get("propagation", {})
+    LocalMemory.CHANGE_ONLY = (propagation_cfg.get("change_only", False)
+                               if args.change_only is None else args.change_only)
+    LocalMemory.JOURNAL_SIZE = max(0, int(cfg.get("journal", {}).get("capacity", 0) or 0)
+                                   if args.journal is None else args.journal)
+    flush_cfg = cfg.get("flush", {})
+    flush_ticks = int(flush_cfg.get("ticks", 10))
+    early_flush_stop = (flush_cfg.get("early_stop", False)
+                        if args.early_flush_stop is None else args.early_flush_stop)
+    eviction_cfg = cfg.get("eviction", {})
+    eviction_enabled = eviction_cfg.get("enabled", False) if args.eviction is None else args.eviction
+    LocalMemory.EVICTION = EvictionPolicy.from_config(eviction_cfg) if eviction_enabled else None
+    network_cfg = cfg.get("network", {})
+    sync_cfg = cfg.get("anti_entropy", {})
+    sync_enabled = sync_cfg.get("enabled", False) if args.anti_entropy is None else args.anti_entropy
+    network_enabled = network_cfg.get("enabled", False) if args.network is None else args.network
+
+    start_tick = 1
+    if checkpoint_every or args.resume:
+        from simulation.checkpoint import save_checkpoint, load_checkpoint, latest_checkpoint
+    if args.resume:
+        path = latest_checkpoint(checkpoint_dir) if args.resume == "latest" else args.resume
+        if path is None:
+            raise SystemExit(f"No checkpoint found in {checkpoint_dir}")
+        state = load_checkpoint(path)
+        print(f"[RESUME] {path} (tick {state['tick']})")
+        grng.set_seed(state["seed"])
+        set_world(state["world"])
+        base_agent.COMM_PROB = state["comm_prob"]
+        logger = state["logger"]
+        logger.rewind(state["log_offset"])
+        all_agents = state["agents"]
+        global_store = state["global_store"]
+        tracker = state["tracker"]
+        VALUES.replace(state["values"])
+        if tracker is not None:
+            tracker.rewind()
+        global_store.rewind()
+        bad_update_rng = state["bad_update_rng"]
+        monitor = state.get("monitor")
+        network = state.get("network")
+        anti_entropy = state.get("anti_entropy")
+        search_agents = [a for a in all_agents if isinstance(a, SearchAgent)]
+        for stream in {a.proposal_stream for a in search_agents if a.proposal_stream is not None}:
+            stream.rewind()
+        rescue_agents = [a for a in all_agents if isinstance(a, RescueAgent)]
+        relay_agents  = [a for a in all_agents if isinstance(a, RelayAgent)]
+        base_agent.BaseAgent.register_delivery_map(build_delivery_map(all_agents))
+        RescueAgent.configure_bidding(
+            [a for a in rescue_agents if a.__dict__.get("tick") is not _offline_tick], **bidding_cfg)
+        if metrics:
+            metrics.rewind(state.get("metrics_offset"), state["tick"], all_agents)
+        start_tick = state["tick"] + 1
+    else:
+        log_cfg = dict(cfg.get("logging", {}))
+        storage = {k: log_cfg.pop(k) for k in ("compression", "chunk_rows") if k in log_cfg}
+        if args.log_compression:
+            storage["compression"] = None if args.log_compression == "none" else args.log_compression
+        clear_stale_outputs(output_format, snapshot_cfg.get("backend", "json"))
+        logger = Logger(log_dir=LOG_DIR, policy=LogPolicy.from_config(log_cfg),
+                        output_format=output_format, **storage)
+        # Every agent/subsystem draws from its own stream derived from the seed,
+        # so results do not depend on coroutine interleaving.
+        grng.set_seed(seed)
+        bad_update_rng = grng.stream("runner", "bad_update")
+        network = None
+        if network_enabled:
+            network = Network.from_config(network_cfg, seed_stream=grng.stream("runner", "network"))
+        search_agents, rescue_agents, relay_agents = await build_run(logger, fan_out, seed, snapshot_cfg, region_cfg)
+        all_agents = search_agents + rescue_agents + relay_agents
+        RescueAgent.configure_bidding(rescue_agents, **bidding_cfg)
+        if output_format == "jsonl":
+            from memory.jsonl_store import JsonlWriter
+            proposals = JsonlWriter(os.path.join(LOG_DIR, "proposal_distributions.jsonl"))
+            for agent in search_agents:
+                agent.proposal_stream = proposals
+        anti_entropy = None
+        if sync_enabled:
+            anti_entropy = AntiEntropy.from_config(sync_cfg)
+            anti_entropy.attach(all_agents)
+        monitor = None
+        if monitors_enabled:
+            with open(ONTO_PATH) as f:
+                monitor = TheoremMonitor(json.load(f), max_delay=monitor_cfg.get("max_delay", 3),
+                                         region_access=load_region_access(LOG_DIR))
+            for agent in all_agents:
+                monitor.attach(agent.memory)
+            monitor.attach_store(global_store)
+    logger.metrics = metrics
+    base_agent.NETWORK = network
+    progress = {"tick": start_tick - 1, "ticks": ticks, "start_tick": start_tick,
+                "phase": "running", "started": time.perf_counter()}
+    status_server = None
+    if status_enabled:
+        status_server = StatusServer.from_config(status_cfg, lambda: collect_status(
+            progress, metrics, all_agents, global_store, monitor, network, anti_entropy))
+        print(f"[STATUS] serving {await status_server.start()}")
+    try:
+        track_digests = snapshot_cfg.get("digests", False) and tracker is not None
+        if early_flush_stop or track_digests:
+            # Rolling digests, resynced here so a checkpoint taken without them resumes correctly
+            for agent in all_agents:
+                agent.memory.track_digest()
+            if early_flush_stop:
+                global_store.track_digests()
+            if track_digests:
+                tracker.track_digests()
+
+        for tick in range(start_tick, ticks + 1):
+            print(f"\n--- TICK {tick} ---")
+            progress["tick"] = tick
+            if metrics:
+                metrics.begin_tick(tick)
+            if monitor:
+                monitor.begin_tick(tick)
+            if network:
+                # Messages whose latency/retries end this tick land before agents act
+                with phase("delivery", exclude=("logging",)):
+                    await network.release(tick)
+            if tick == 6:
+                print("Simulating failure: rescue2 and relay1 disabled.")
+                if RescueAgent.SPATIAL_INDEX is not None:
+                    RescueAgent.SPATIAL_INDEX.remove("rescue2")   # offline rescuers are never nearest
+                for agent in rescue_agents + relay_agents:
+                    if agent.agent_id in {"rescue2", "relay1"}:
+                        agent.tick = _offline_tick  # Disable the agent
+                        if agent.logger:
+                            await agent.logger.log(tick, agent.agent_id, "failure", "status", "agent_offline", validated=False, in_scope=True)
+
+            should_inject_bad = False
+            if bad_update_interval and bad_update_interval > 0 and tick % bad_update_interval == 0:
+                should_inject_bad = True
+            if tick in bad_update_ticks:
+                should_inject_bad = True
+            if should_inject_bad:
+                inject_bad_update(all_agents, tick, rng=bad_update_rng)
+
+            with phase("agents", exclude=("delivery", "logging")):
+                await asyncio.gather(*(agent.tick(all_agents, tick) for agent in all_agents))
+                await asyncio.sleep(0)   # let queued log writes land before snapshot/checkpoint
+            if anti_entropy:
+                with phase("delivery", exclude=("logging",)):
+                    await anti_entropy.round(
+                        [a for a in all_agents if a.__dict__.get("tick") is not _offline_tick],
+                        tick, base_agent.COMM_PROB)
+                    await asyncio.sleep(0)
+            if LocalMemory.EVICTION is not None:
+                for agent in all_agents:
+                    agent.memory.expire(tick)
+                await asyncio.sleep(0)
+            if monitor:
+                monitor.end_tick(tick)
+            if tracker is not None:
+                # Snapshot memory after all updates
+                combined_global = {}
+                for a in all_agents:
+                    combined_global.update(a.memory.codes())
+                with phase("tracker"):
+                    tracker.snapshot(all_agents, combined_global)
+                with phase("global_snapshot"):
+                    global_store.snapshot(all_agents, tick)
+
+            if checkpoint_every and tick % checkpoint_every == 0:
+                with phase("checkpoint"):
+                    path = save_checkpoint({
+                        "tick": tick,
+                        "seed": grng.SEED,
+                        "comm_prob": base_agent.COMM_PROB,
+                        "world": gw.WORLD,
+                        "agents": all_agents,
+                        "global_store": global_store,
+                        "tracker": tracker,
+                        "monitor": monitor,
+                        "network": network,
+                        "anti_entropy": anti_entropy,
+                        "values": VALUES,
+                        "bad_update_rng": bad_update_rng,
+                        "logger": logger,
+                        "log_offset": logger.offset(),
+                        "metrics_offset": metrics.offset() if metrics else None,
+                    }, checkpoint_dir)
+                print(f"[CHECKPOINT] {path}")
+            if metrics:
+                metrics.end_tick(all_agents, global_store)
+
+        online = [a for a in all_agents if a.__dict__.get("tick") is not _offline_tick]
+        for agent in all_agents:
+            agent.tick = lambda *_: None  # disable behavior
+        progress["phase"] = "flush"
+
+        for flush_tick in range(1, flush_ticks + 1):
+            print(f"\n--- FLUSH TICK {flush_tick} ---")
+            # no new updates — messages still in flight land, then snapshot
+            if network:
+                await network.release(ticks + flush_tick)
+                await asyncio.sleep(0)
+            if tracker is not None:
+                combined_global = {}
+                for a in all_agents:
+                    combined_global.update(a.memory.codes())
+                tracker.snapshot(all_agents, combined_global)
+                global_store.snapshot(all_agents, flush_tick)
+            if early_flush_stop and flush_converged(online, global_store, network):
+                print(f"[✓] Flush converged after {flush_tick} tick(s)")
+                break
+
+
+
+        for agent in all_agents:
+            if agent.memory:
+                logger.register_memory(agent.agent_id, agent.memory.all_state())
+
+        # Step: Generate ontology_access.json for evaluation
+        ontology_access = {
+            agent.agent_id: list(agent.slice.allowed_prefixes)
+            for agent in all_agents
+        }
+        with open(os.path.join(logger.log_dir, "ontology_access.json"), "w") as f:
+            json.dump(ontology_access, f, indent=2)
+        # Per-agent eviction counts for the validators; a stale file would misreport an unbounded run
+        evictions_path = os.path.join(logger.log_dir, "evictions.json")
+        if LocalMemory.EVICTION is not None:
+            with open(evictions_path, "w") as f:
+                json.dump({agent.agent_id: agent.memory.evicted for agent in all_agents}, f, indent=2)
+        elif os.path.exists(evictions_path):
+            os.remove(evictions_path)
+
+        if tracker is not None:
+            global_store.save(os.path.join(LOG_DIR, "global_memories_canonical.json"))
+        global_store.history.save(os.path.join(LOG_DIR, "global_history.json"))
+        # Save true final global memory (used by convergence checker)
+        # with open("logs/memory_dump_global.json", "w") as f:
+        #     json.dump(global_store.memory, f, indent=2)
+        if tracker is not None:
+            combined_global = global_store.memory
+            tracker.snapshot(all_agents, combined_global)
+
+        logger.dump()
+        if tracker is not None:
+            tracker.save(LOG_DIR)
+        for agent in search_agents:
+            agent.dump_proposals(LOG_DIR)
+        for stream in {a.proposal_stream for a in search_agents if a.proposal_stream is not None}:
+            stream.close()
+
+        if monitor:
+            path = monitor.save(LOG_DIR)
+            print(f"[✓] Online theorem checks written to {path}")
+            print(json.dumps(monitor.results(), indent=2))
+
+        if LocalMemory.EVICTION is not None:
+            print(f"[✓] Evicted {sum(a.memory.evicted for a in all_agents)} keys; "
+                  f"{max(len(a.memory.state) for a in all_agents)} keys in the largest memory")
+        if anti_entropy:
+            print(f"[✓] Anti-entropy: {anti_entropy.stats}")
+        if network:
+            print(f"[✓] Network: {network.stats}, {network.in_flight()} still in flight")
+
+        if metrics:
+            metrics.close()
+            print(f"[✓] Tick metrics written to {metrics.path}")
+            if metrics_summary:
+                print(metrics.summary())
+        progress["phase"] = "done"
+    finally:
+        if status_server:
+            await status_server.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import os
+import time
+
+
+def collect_status(progress, metrics, agents, global_store, monitor=None, network=None, anti_entropy=None):
+    """
+    JSON-ready view of a running simulation. `progress` is the runner's
+    {"tick", "ticks", "start_tick", "phase", "started"} dict; message and
+    memory figures come from the Metrics totals and recent rows. Monitor
+    results are computed once per tick and phase, however often clients poll.
+    """
+    elapsed = time.perf_counter() - progress["started"]
+    ticks = metrics.ticks if metrics else 0
+    recent = list(metrics.recent) if metrics else []
+    recent_wall = sum(r["wall_s"] for r in recent)
+    totals = {c: metrics.totals[c] for c in ("broadcasts", "candidates", "deliveries",
+                                             "drops", "rejected", "evicted")} if ticks else {}
+    sizes = [len(a.memory.state) for a in agents if a.memory]
+    status = {
+        "tick": progress["tick"],
+        "ticks": progress["ticks"],
+        "phase": progress["phase"],
+        "elapsed_s": round(elapsed, 3),
+        "ticks_per_s": round((ticks - metrics.resumed_ticks) / elapsed, 3) if ticks and elapsed > 0 else None,
+        "recent_ticks_per_s": round(len(recent) / recent_wall, 3) if recent_wall > 0 else None,
+        "last_tick": metrics.last if ticks else None,
+        "totals": totals,
+        "rates": {
+            "broadcasts_per_tick": round(totals["broadcasts"] / ticks, 3) if ticks else None,
+            "deliveries_per_tick": round(totals["deliveries"] / ticks, 3) if ticks else None,
+            "drop_rate": (round(totals["drops"] / max(1, totals["drops"] + totals["deliveries"]), 4)
+                          if ticks else None),
+        },
+        "memory": {
+            "local_keys": sum(sizes),
+            "max_local_keys": max(sizes, default=0),
+            "global_keys": len(global_store.memory) if global_store else 0,
+        },
+        "monitor": _monitor_results(progress, monitor) if monitor else None,
+        "network": dict(network.stats, in_flight=network.in_flight()) if network else None,
+        "anti_entropy": dict(anti_entropy.stats) if anti_entropy else None,
+    }
+    return status
+
+
+def _monitor_results(progress, monitor):
+    """monitor.results(), cached in `progress` until the tick or phase changes."""
+    key = (progress["tick"], progress["phase"])
+    cached = progress.get("monitor_results")
+    if cached is None or cached[0] != key:
+        cached = progress["monitor_results"] = (key, monitor.results())
+    return cached[1]
+
+
+class StatusServer:
+    """
+    Minimal HTTP server on the runner's event loop (the "status_server"
+    block of run_mode.json). GET / or /status returns collect_status() as
+    JSON; anything else is a 404. Listens on host:port, or on a Unix socket
+    when `unix_socket` is set (curl --unix-socket PATH http://localhost/status).
+
+    Requests are answered whenever the simulation yields to the loop, at
+    the latest once per tick, so a slow client never stalls a tick.
+    """
+    def __init__(self, status, host="127.0.0.1", port=8765, unix_socket=None):
+        self.status = status          # callable returning the status dict
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.server = None
+
+    @classmethod
+    def from_config(cls, cfg, status):
+        cfg = {k: v for k, v in cfg.items() if k != "enabled"}
+        return cls(status, **cfg)
+
+    async def start(self):
+        if self.unix_socket:
+            if os.path.exists(self.unix_socket):
+                os.remove(self.unix_socket)
+            self.server = await asyncio.start_unix_server(self._handle, path=self.unix_socket)
+            return f"unix:{self.unix_socket}"
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/status"
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+            if self.unix_socket and os.path.exists(self.unix_socket):
+                os.remove(self.unix_socket)
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass   # headers
+            parts = request.decode(errors="replace").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else ""
+            if len(parts) > 1 and parts[0] == "GET" and path in ("/", "/status"):
+                code, body = "200 OK", json.dumps(self.status(), indent=2, default=str)
+            else:
+                code, body = "404 Not Found", json.dumps({"error": "not found", "paths": ["/status"]})
+            data = body.encode()
+            writer.write(f"HTTP/1.1 {code}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
@@ -9,7 +9,9 @@ Usage:
         --run rho0.5:logs/run_rho05 \
         --run rho0.8:logs/run_rho08
 
-Each run directory must contain `update_log.csv` and `local_memories.json`.
+Each run directory must contain `update_log.csv` (or `update_log.csv.gz`) and
+`local_memories.json` (or `local_memories.jsonl`, or the mmap store
+`snapshots/local/`).
 """
 import argparse
 import json
@@ -17,18 +19,21 @@ import os
 import shutil
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Tuple
 
-import matplotlib
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
 
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
-from matplotlib import rcParams, rc
+from logger.reader import INDEX_NAME, LOG_NAMES, LogReader
+from memory.jsonl_store import artifact_path, load_artifact
 
 
 def export_figure(filename: str):
+    import matplotlib.pyplot as plt
+    from matplotlib import rcParams, rc
     rcParams["figure.figsize"] = (3.33, 2.2)
     rcParams["figure.dpi"] = 100
     rcParams["pdf.fonttype"] = 42
@@ -37,64 +42,90 @@ def export_figure(filename: str):
     plt.savefig(filename, bbox_inches="tight")
 
 
-def reconstruct_global_trace(update_log: pd.DataFrame) -> List[Dict[str, str]]:
-    validated = update_log[
-        (update_log["event"] == "memory_update")
-        & (update_log["validated"].astype(str).str.upper() == "TRUE")
-    ].copy()
-    validated["tick"] = validated["tick"].astype(int)
-    max_tick = validated["tick"].max()
+@lru_cache(maxsize=2)
+def load_run(run_dir: str) -> Dict[str, List[Dict[str, str]]]:
+    """Local memories of a run, cached per process across its partitions."""
+    local_path = artifact_path(run_dir, "local_memories")
+    has_log = any(os.path.exists(os.path.join(run_dir, name)) for name in LOG_NAMES)
 
-    trace: List[Dict[str, str]] = []
-    current: Dict[str, str] = {}
-    for t in range(max_tick + 1):
-        tick_updates = validated[validated["tick"] == t]
-        for _, row in tick_updates.iterrows():
-            current[row["key"]] = row["value"]
-        trace.append(current.copy())
-    return trace
-
-
-def load_alignment_delays(run_dir: str) -> List[int]:
-    update_path = os.path.join(run_dir, "update_log.csv")
-    local_path = os.path.join(run_dir, "local_memories.json")
-
-    if not (os.path.exists(update_path) and os.path.exists(local_path)):
+    if not (has_log and os.path.exists(local_path)):
         raise FileNotFoundError(
-            f"Expected update_log.csv and local_memories.json in {run_dir}"
+            f"Expected update_log.csv(.gz) and local_memories.json(l) or snapshots/local/ in {run_dir}"
         )
 
-    update_log = pd.read_csv(update_path)
-    with open(local_path) as f:
-        local_memories = json.load(f)
-
-    global_trace = reconstruct_global_trace(update_log)
-    T = len(global_trace)
-    alignment_delays: List[int] = []
-
-    for t in range(T - 1):
-        g_prev = global_trace[t]
-        g_next = global_trace[t + 1]
-        for key in g_next:
-            if key not in g_prev or g_next[key] != g_prev[key]:
-                for agent, mem_list in local_memories.items():
-                    if len(mem_list) <= t + 1 or key not in mem_list[t + 1]:
-                        continue
-                    if mem_list[t + 1].get(key) == g_next[key]:
-                        continue
-
-                    for t_prime in range(t + 2, T):
-                        if len(mem_list) <= t_prime:
-                            break
-                        local_val = mem_list[t_prime].get(key)
-                        global_val = global_trace[t_prime].get(key)
-                        if local_val == global_val:
-                            alignment_delays.append(t_prime - (t + 1))
-                            break
-    return alignment_delays
-
-
-def compute_survival(delays: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    return load_artifact(local_path)
+
+
+def alignment_delays(global_states, local_memories, agents=None) -> List[int]:
+    """
+    Delays of local copies that disagree with a global change, realigned
+    later. `global_states` is LogReader.global_states(); a copy waits until
+    it matches, leaves the agent's memory, or the snapshots end.
+    """
+    if agents is None:
+        agents = list(local_memories)
+    pending: List[Tuple[int, str, int, list]] = []   # (order, key, global tick, snapshots)
+    found: List[Tuple[int, int]] = []                # (order, delay)
+    order = 0
+
+    for tick, state, changed in global_states:
+        waiting = []
+        for entry in pending:
+            _, key, start, mem_list = entry
+            if len(mem_list) <= tick or key not in mem_list[tick]:
+                continue   # evicted before it realigned: no longer held, no delay
+            if mem_list[tick][key] == state.get(key):
+                found.append((entry[0], tick - start))
+            else:
+                waiting.append(entry)
+        pending = waiting
+
+        if tick == 0 or not changed:
+            continue
+        for key in [k for k in state if k in changed]:
+            for agent in agents:
+                mem_list = local_memories[agent]
+                if len(mem_list) <= tick or key not in mem_list[tick]:
+                    continue
+                if mem_list[tick].get(key) == state[key]:
+                    continue
+                pending.append((order, key, tick, mem_list))
+                order += 1
+    return [delay for _, delay in sorted(found)]
+
+
+def load_alignment_delays(run_dir: str, part: int = 0, parts: int = 1) -> List[int]:
+    """Delays of every `parts`-th agent (sorted by id) starting at `part`; all agents by default."""
+    local_memories = load_run(run_dir)
+    agents = sorted(local_memories)[part::parts]
+    return alignment_delays(LogReader(run_dir).global_states(), local_memories, agents)
+
+
+def _delays_task(task: Tuple[str, int, int]) -> List[int]:
+    return load_alignment_delays(*task)
+
+
+def collect_delays(run_dirs: List[str], workers: int) -> List[List[int]]:
+    """
+    Alignment delays per run directory. With more than one worker each run
+    is split into agent partitions and the (run, partition) tasks go to a
+    process pool; partial results are merged back per run in input order.
+    """
+    if workers <= 1:
+        return [load_alignment_delays(run_dir) for run_dir in run_dirs]
+
+    parts = max(1, -(-workers // len(run_dirs)))
+    owners = [i for i in range(len(run_dirs)) for _ in range(parts)]
+    tasks = [(run_dir, part, parts) for run_dir in run_dirs for part in range(parts)]
+    merged: List[List[int]] = [[] for _ in run_dirs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, delays in zip(owners, pool.map(_delays_task, tasks)):
+            merged[i].extend(delays)
+    return merged
+
+
+def compute_survival(delays: List[int]) -> "Tuple[np.ndarray, np.ndarray]":
+    import numpy as np
     if not delays:
         return np.array([]), np.array([])
     xs = np.array(sorted(set(delays)))
@@ -103,6 +134,13 @@ def compute_survival(delays: List[int]) -> Tuple[np.ndarray, np.ndarray]:
 
 
 def main():
+    # Heavy dependencies load here, not when the module (or a worker process) imports it
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+
     parser = argparse.ArgumentParser(
         description="Plot alignment-delay survival curves with exponential fits."
     )
@@ -139,6 +177,12 @@ def main():
         default="alignment_tail_with_fits.pdf",
         help="Path to output PDF.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to compute delays; runs are split by agent (default: CPU count, 1 = serial).",
+    )
     args = parser.parse_args()
 
     run_specs = list(args.run or [])
@@ -166,11 +210,13 @@ def main():
                 )
                 dest = os.path.join(args.log_base, label)
                 os.makedirs(dest, exist_ok=True)
-                shutil.copy("logs/update_log.csv", os.path.join(dest, "update_log.csv"))
-                shutil.copy(
-                    "logs/local_memories.json",
-                    os.path.join(dest, "local_memories.json"),
-                )
+                local_name = os.path.relpath(artifact_path("logs", "local_memories"), "logs")
+                for name in (*LOG_NAMES, INDEX_NAME, local_name):
+                    src = os.path.join("logs", name)
+                    if os.path.isdir(src):   # mmap snapshot store
+                        shutil.copytree(src, os.path.join(dest, name), dirs_exist_ok=True)
+                    elif os.path.exists(src):
+                        shutil.copy(src, os.path.join(dest, name))
                 run_specs.append(f"{label}:{dest}")
         finally:
             with open(args.config, "w") as f:
@@ -188,14 +234,18 @@ def main():
     plt.rc("legend", fontsize=9)
     plt.figure(figsize=(5.5, 3.0))
 
-    summary_rows = []
+    runs = []
     for spec in run_specs:
         try:
             label, run_dir = spec.split(":", 1)
         except ValueError:
             raise SystemExit(f"Invalid --run specification '{spec}' (expected LABEL:DIR)")
+        runs.append((label, run_dir))
+
+    run_delays = collect_delays([run_dir for _, run_dir in runs], args.workers)
 
-        delays = load_alignment_delays(run_dir)
+    summary_rows = []
+    for (label, _), delays in zip(runs, run_delays):
         xs, ys = compute_survival(delays)
         if xs.size == 0:
             print(f"[WARN] No alignment delays for {label}")
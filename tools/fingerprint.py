@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Fingerprints of simulation runs, for proving that a faster engine produces
+the same results as the reference one.
+
+Usage:
+    python tools/fingerprint.py logs            # fingerprint of a finished run
+    python tools/fingerprint.py --check         # rerun the reference configs, compare with the goldens
+    python tools/fingerprint.py --update        # rerun them and store new goldens
+    python tools/fingerprint.py --check --only baseline network
+
+A fingerprint hashes what a run computed, not how it stored it:
+
+    events          ordered hash of every update_log row minus its wall-clock
+                    column (plain or gzip log alike)
+    events_unordered  order-independent digest of the same rows; when only
+                    `events` differs, the engine emits the same rows in
+                    another order
+    rows            number of update_log rows
+    final_memories  every agent's final memory (memory_dump_*.json or
+                    memory_dumps.jsonl)
+    global_history  per-key version history of the global memory
+
+Golden fingerprints live in tests/fingerprints.json: one entry per reference
+config, holding a complete run_mode.json, extra runner arguments and the
+expected fingerprint. The configs do not layer over config/run_mode.json, so
+local edits to it never change what --check runs.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from glob import glob
+from hashlib import blake2b
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from logger.reader import LogReader
+from memory.digest import MASK
+from memory.jsonl_store import iter_jsonl
+
+GOLDEN_PATH = os.path.join(REPO_ROOT, "tests", "fingerprints.json")
+ROW_FIELDS = ("tick", "agent", "event", "key", "value", "validated", "in_scope")
+
+
+def _row_hash(line):
+    return int.from_bytes(blake2b(line.encode(), digest_size=8).digest(), "big")
+
+
+def _canonical_hash(obj):
+    text = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+    return blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def final_memories(run_dir):
+    """{agent: final memory} from either memory dump format."""
+    streamed = os.path.join(run_dir, "memory_dumps.jsonl")
+    if os.path.exists(streamed):
+        return dict(iter_jsonl(streamed))
+    memories = {}
+    for path in glob(os.path.join(run_dir, "memory_dump_*.json")):
+        agent_id = os.path.basename(path)[len("memory_dump_"):-len(".json")]
+        with open(path) as f:
+            memories[agent_id] = json.load(f)
+    return memories
+
+
+def fingerprint(run_dir):
+    ordered = blake2b(digest_size=16)
+    unordered = 0
+    rows = 0
+    for row in LogReader(run_dir).rows():
+        line = "\x1f".join(row[field] for field in ROW_FIELDS)
+        ordered.update(line.encode() + b"\n")
+        unordered = (unordered + _row_hash(line)) & MASK
+        rows += 1
+    history_path = os.path.join(run_dir, "global_history.json")
+    history = None
+    if os.path.exists(history_path):
+        with open(history_path) as f:
+            history = json.load(f)
+    return {
+        "events": ordered.hexdigest(),
+        "events_unordered": f"{unordered:016x}",
+        "rows": rows,
+        "final_memories": _canonical_hash(final_memories(run_dir)),
+        "global_history": _canonical_hash(history),
+    }
+
+
+def compare(expected, actual):
+    """Names of the fingerprint fields that differ."""
+    return [field for field in expected if expected.get(field) != actual.get(field)]
+
+
+def _launch(spec, work_dir):
+    """Start one reference run in work_dir; returns the process."""
+    cfg_path = os.path.join(work_dir, "run_mode.json")
+    with open(cfg_path, "w") as f:
+        json.dump(spec["config"], f)
+    cmd = [sys.executable, "-m", "main", "--config", cfg_path,
+           "--log_dir", os.path.join(work_dir, "logs"), *spec.get("args", [])]
+    with open(os.path.join(work_dir, "stderr.txt"), "w") as stderr:
+        return subprocess.Popen(cmd, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=stderr)
+
+
+def run_references(specs, workers):
+    """{name: fingerprint} of each reference config, running `workers` at a time."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="fingerprint_") as tmp:
+        pending = sorted(specs)
+        running = []
+        while pending or running:
+            while pending and len(running) < workers:
+                name = pending.pop(0)
+                work_dir = os.path.join(tmp, name)
+                os.makedirs(work_dir)
+                running.append((name, work_dir, _launch(specs[name], work_dir)))
+            name, work_dir, proc = running.pop(0)
+            if proc.wait():
+                with open(os.path.join(work_dir, "stderr.txt")) as f:
+                    raise SystemExit(f"Reference run {name} failed:\n{f.read()[-2000:]}")
+            results[name] = fingerprint(os.path.join(work_dir, "logs"))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprint runs and compare them with golden fingerprints.")
+    parser.add_argument("run_dir", nargs="?", help="Run directory to fingerprint (e.g. logs).")
+    parser.add_argument("--check", action="store_true", help="Rerun the reference configs and compare.")
+    parser.add_argument("--update", action="store_true", help="Rerun the reference configs and store their fingerprints.")
+    parser.add_argument("--only", nargs="+", default=None, help="Reference configs to run (default: all).")
+    parser.add_argument("--golden", default=GOLDEN_PATH, help="Golden fingerprint file.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Reference runs at a time (default: CPU count).")
+    args = parser.parse_args()
+
+    if not (args.check or args.update):
+        if not args.run_dir:
+            parser.error("give a run directory, --check or --update")
+        print(json.dumps(fingerprint(args.run_dir), indent=2))
+        return
+
+    with open(args.golden) as f:
+        golden = json.load(f)
+    names = args.only or sorted(golden)
+    unknown = [name for name in names if name not in golden]
+    if unknown:
+        raise SystemExit(f"Unknown reference config(s): {', '.join(unknown)}")
+    results = run_references({name: golden[name] for name in names}, max(1, args.workers))
+
+    if args.update:
+        for name, result in results.items():
+            golden[name]["fingerprint"] = result
+        with open(args.golden, "w") as f:
+            json.dump(golden, f, indent=2)
+            f.write("\n")
+        print(f"[✓] Updated {len(results)} golden fingerprint(s) in {args.golden}")
+        return
+
+    failed = 0
+    for name in names:
+        expected = golden[name].get("fingerprint")
+        diff = compare(expected, results[name]) if expected else None
+        if diff is None:
+            failed += 1
+            print(f"[✗] {name}: no golden fingerprint (run --update)")
+        elif diff:
+            failed += 1
+            print(f"[✗] {name}: {', '.join(diff)} differ")
+        else:
+            print(f"[✓] {name}")
+    if failed:
+        raise SystemExit(f"{failed} of {len(names)} reference config(s) changed")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,28 @@
 #!/usr/bin/env python3
+import argparse
+import json
 import os
 import sys
-import numpy as np
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+import time
 
 REPO_ROOT = os.path.dirname(os.path.dirname(__file__))
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 
-from simulation.runner import generate_fanout_slices
+from simulation.runner import configure, generate_fanout_slices
 
 # === CONFIGURATION ===
 FRACTIONS = [0.05, 0.20, 0.40, 0.60, 0.80, 1.0]
-RUNS      = 100                           # repetitions per fraction
+RUNS      = 10000                         # repetitions per fraction
+EXACT_RUNS = 100                          # repetitions for --exact
 KEYS      = ["Survivor", "ZoneStatus", "Relay", "Rescue", "Bid"]
+CONFIG    = "config/run_mode.json"       # agent counts for generate_fanout_slices
 # =====================
 
-plt.style.use('seaborn-v0_8-paper')
-plt.rc('font',      family='serif', size=10)
-plt.rc('mathtext',  fontset='dejavuserif')
-plt.rc('axes',      titlesize=14, labelsize=11)
-plt.rc('xtick',     labelsize=10)
-plt.rc('ytick',     labelsize=10)
-plt.rc('legend',    fontsize=9)
-
-from matplotlib import rcParams, rc
 
 def export_figure(filename="slice_scaling.pdf"):
+    import matplotlib.pyplot as plt
+    from matplotlib import rcParams, rc
     # Physical size: fits 3.33-inch IEEE column
     rcParams["figure.figsize"] = (3.33, 2.2)   # width, height in inches
     rcParams["figure.dpi"] = 100               # dpi irrelevant for PDF
@@ -39,19 +32,62 @@ def export_figure(filename="slice_scaling.pdf"):
     plt.savefig(filename, bbox_inches="tight") # vector, loss-free
 
 
-def measure():
+def sample_counts(f, n_rescue, n_relay, runs, rng):
+    """
+    Messages per published update (1 search publisher + subscribers) for
+    `runs` independent draws of generate_fanout_slices(f), shape (runs, len(KEYS)).
+
+    Same model as generate_fanout_slices: each prefix gets k = round(f * total)
+    owners drawn without replacement, and agents that own nothing fall back to
+    {"Survivor"}. Every prefix therefore has 1 + k subscribers except Survivor,
+    which also gains the agents left empty. That number is the only random
+    part: each prefix's k owners hit a hypergeometric number of the agents
+    still empty, so all runs are drawn with one array operation per prefix.
+    """
+    import numpy as np
+    total = n_rescue + n_relay
+    k = max(1, round(f * total))
+    empty = np.full(runs, total, dtype=np.int64)
+    for _ in KEYS:
+        empty -= rng.hypergeometric(empty, total - empty, k)
+    counts = np.full((runs, len(KEYS)), 1 + k, dtype=np.int64)
+    counts[:, KEYS.index("Survivor")] += empty
+    return counts
+
+
+def summarize(f, counts):
+    """(f, mean, std, ci_low, ci_high); the 95% CI is for the mean, across runs."""
+    import numpy as np
+    per_run = counts.mean(axis=1)
+    half = 1.96 * per_run.std(ddof=1) / np.sqrt(len(per_run)) if len(per_run) > 1 else 0.0
+    mean = counts.mean()
+    return f, mean, counts.std(), mean - half, mean + half
+
+
+def measure(fractions=FRACTIONS, runs=RUNS, seed=0):
     """
     Returns (data, total_agents)
-      data          = [(f, mean_msgs, std_msgs), …]
+      data          = [(f, mean_msgs, std_msgs, ci_low, ci_high), …]
       total_agents  = rescue + relay (used for the ideal/broadcast lines)
     """
+    import numpy as np
+    import simulation.runner as runner
+    rng = np.random.default_rng(seed)
+    data = [summarize(f, sample_counts(f, runner.N_RESCUE, runner.N_RELAY, runs, rng))
+            for f in fractions]
+    return data, runner.N_RESCUE + runner.N_RELAY
+
+
+def measure_exact(fractions=FRACTIONS, runs=EXACT_RUNS):
+    """measure() by building the slices with generate_fanout_slices, one seed per run."""
+    import numpy as np
     data = []
     total_agents = None                   # we’ll discover this on the first run
 
-    for f in FRACTIONS:
+    for f in fractions:
         all_counts = []
 
-        for seed in range(RUNS):
+        for seed in range(runs):
             # build slices
             _, rescue_slices, relay_slices = generate_fanout_slices(f, seed)
 
@@ -68,22 +104,39 @@ def measure():
                     if k in subs:         # ignore AgentPos / ZoneCoord
                         subs[k] += 1
 
-            all_counts.extend(subs.values())
+            all_counts.append([subs[k] for k in KEYS])
 
-        data.append((f, np.mean(all_counts), np.std(all_counts)))
+        data.append(summarize(f, np.array(all_counts)))
 
     return data, total_agents
 
 
-def plot(data, total_agents):
+def plot(data, total_agents, output="convergence.pdf", errorbars="std"):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    plt.style.use('seaborn-v0_8-paper')
+    plt.rc('font',      family='serif', size=10)
+    plt.rc('mathtext',  fontset='dejavuserif')
+    plt.rc('axes',      titlesize=14, labelsize=11)
+    plt.rc('xtick',     labelsize=10)
+    plt.rc('ytick',     labelsize=10)
+    plt.rc('legend',    fontsize=9)
+
     f_vals = np.linspace(0, 1, 100)
 
-    fs, means, stds = zip(*data)
+    fs, means, stds, ci_low, ci_high = zip(*data)
     means, stds = np.asarray(means), np.asarray(stds)
 
-    # asym­metric whiskers: never dip below 1 msg
-    lower_err = np.minimum(stds, means - 1.0)
-    upper_err = stds
+    if errorbars == "ci":
+        lower_err = means - np.asarray(ci_low)
+        upper_err = np.asarray(ci_high) - means
+    else:
+        # asym­metric whiskers: never dip below 1 msg
+        lower_err = np.minimum(stds, means - 1.0)
+        upper_err = stds
 
     plt.figure()
     plt.errorbar(fs, means,
@@ -103,11 +156,50 @@ def plot(data, total_agents):
     plt.legend()
     plt.tight_layout()
     
-    export_figure("convergence.pdf")
+    export_figure(output)
 
     
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Messages per update vs. slice fraction f.")
+    parser.add_argument("--fractions", type=float, nargs="+", default=FRACTIONS)
+    parser.add_argument("--steps", type=int, default=None,
+                        help="Sweep STEPS evenly spaced fractions in (0, 1] instead of --fractions.")
+    parser.add_argument("--runs", type=int, default=None,
+                        help=f"Repetitions per fraction (default {RUNS}, or {EXACT_RUNS} with --exact).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--exact", action="store_true",
+                        help="Build every slice set with generate_fanout_slices (slow reference path).")
+    parser.add_argument("--errorbars", choices=["std", "ci"], default="std",
+                        help="Whiskers: per-update std (default) or 95%% CI of the mean.")
+    parser.add_argument("--config", default=CONFIG)
+    parser.add_argument("--output", default="convergence.pdf")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        configure(json.load(f))
+    fractions = args.fractions
+    if args.steps:
+        import numpy as np
+        fractions = list(np.linspace(0, 1, args.steps + 1)[1:])
+
+    start = time.perf_counter()
+    if args.exact:
+        data, N_agents = measure_exact(fractions, args.runs or EXACT_RUNS)
+    else:
+        data, N_agents = measure(fractions, args.runs or RUNS, args.seed)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'f':>6}{'mean':>10}{'std':>9}{'95% CI of mean':>22}")
+    for f, mean, std, lo, hi in data:
+        print(f"{f:>6.3f}{mean:>10.3f}{std:>9.3f}   [{lo:8.3f}, {hi:8.3f}]")
+    print(f"[✓] {len(data)} fractions x {args.runs or (EXACT_RUNS if args.exact else RUNS)} runs "
+          f"in {elapsed:.2f}s")
+
+    plot(data, N_agents, args.output, args.errorbars)
+    print(f"[✓] Plot saved to {args.output}")
+
+
 if __name__ == "__main__":
-    data, N_agents = measure()
-    plot(data, N_agents)
+    main()
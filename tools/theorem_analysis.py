@@ -1,36 +1,28 @@
 import json
 import os
-import pandas as pd
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from logger.reader import LogReader, tee_trace
+from memory.jsonl_store import artifact_path, load_artifact
+from ontology.slices import key_in_scope, load_region_access
 
 # === CONFIG ===
-LOG_PATH = "logs/update_log.csv"
-LOCAL_MEMORIES_PATH = "logs/local_memories.json"
+LOG_DIR = "logs"
 GLOBAL_TRACE_PATH = "reconstructed_global_memory_trace_corrected.json"
 ONTOLOGY_ACCESS_PATH = "logs/ontology_access.json"
 
-update_log = pd.read_csv(LOG_PATH)
-
-validated = update_log[
-    (update_log["event"] == "memory_update") &
-    (update_log["validated"].astype(str).str.upper() == "TRUE")
-]
-
-validated["tick"] = validated["tick"].astype(int)
-max_tick = validated["tick"].max()
-
-memory_trace = []
-current_memory = {}
-
-for t in range(max_tick + 1):
-    tick_updates = validated[validated["tick"] == t]
-    for _, row in tick_updates.iterrows():
-        current_memory[row["key"]] = row["value"]
-    memory_trace.append(current_memory.copy())
-
-with open(GLOBAL_TRACE_PATH, "w") as f:
-    json.dump(memory_trace, f, indent=2)
-
-print(f"[✓] Global memory trace reconstructed: {GLOBAL_TRACE_PATH}")
+def reconstruct_global_trace():
+    """
+    Global memory after each tick, replayed from every validated memory_update
+    row (received copies included) chunk by chunk. States stream into
+    GLOBAL_TRACE_PATH as they are consumed; only the current one is in memory.
+    """
+    states = LogReader(LOG_DIR).global_states()
+    return (state for _, state, _ in tee_trace(states, GLOBAL_TRACE_PATH))
 
 # === THEOREM 1: Semantic Coherence ===
 def check_global_semantic_coherence(global_trace, allowed_prefixes):
@@ -45,11 +37,12 @@ def check_global_semantic_coherence(global_trace, allowed_prefixes):
     return violations, total_checked
 
 # === THEOREM 3: Causal Isolation (only new keys per step) ===
-def check_causal_isolation(local_memories, slice_prefixes):
+def check_causal_isolation(local_memories, slice_prefixes, region_access=None):
     violations = []
     total_checked = 0
     for agent, memory_list in local_memories.items():
         allowed = slice_prefixes.get(agent, [])
+        regions = (region_access or {}).get(agent)
         prev_keys = set()
         for t, mem in enumerate(memory_list):
             current_keys = set(mem.keys())
@@ -58,17 +51,16 @@ def check_causal_isolation(local_memories, slice_prefixes):
                 total_checked += 1
                 if not any(key.startswith(prefix + "@") for prefix in allowed):
                     violations.append((agent, t, key))
+                elif regions and not key_in_scope(key, allowed, regions):
+                    violations.append((agent, t, key))   # in a prefix it holds, outside its region
             prev_keys = current_keys
     return violations, total_checked
 
 
 if __name__ == "__main__":
     # Load inputs
-    with open(GLOBAL_TRACE_PATH) as f:
-        global_trace = json.load(f)
-
-    with open(LOCAL_MEMORIES_PATH) as f:
-        local_memories = json.load(f)
+    # logs/local_memories.json, .jsonl when the run streamed its outputs, or logs/snapshots/local
+    local_memories = load_artifact(artifact_path(LOG_DIR, "local_memories"))
 
     with open(ONTOLOGY_ACCESS_PATH) as f:
         slice_prefixes = json.load(f)
@@ -83,14 +75,16 @@ if __name__ == "__main__":
         all_allowed_prefixes.update(prefixes)
 
     print("\n[✓] Checking Theorem 1: Semantic Coherence")
-    t1_violations, t1_total = check_global_semantic_coherence(global_trace, all_allowed_prefixes)
+    t1_violations, t1_total = check_global_semantic_coherence(reconstruct_global_trace(), all_allowed_prefixes)
+    print(f"[✓] Global memory trace reconstructed: {GLOBAL_TRACE_PATH}")
     print(f"Total violations: {len(t1_violations)} / {t1_total}")
 
     if t1_violations:
         print("Sample:", t1_violations[:5])
 
     print("\n[✓] Checking Theorem 3: Causal Isolation")
-    t3_violations, t3_total = check_causal_isolation(local_memories, slice_prefixes)
+    t3_violations, t3_total = check_causal_isolation(local_memories, slice_prefixes,
+                                                     load_region_access(LOG_DIR))
     print(f"Total violations: {len(t3_violations)} / {t3_total}")
 
     if t3_violations:
@@ -1,32 +1,110 @@
+import argparse
 import json
 from collections import defaultdict
 import os
+import sys
 from glob import glob
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from memory.digest import SliceDigests, state_digest
+from memory.jsonl_store import artifact_path, load_artifact
+from ontology.slices import key_in_scope, load_region_access
+
 
 class MemorySnapshotTracker:
-    def __init__(self, ontology_path):
+    """
+    Records each agent's local memory and its projection of the global memory
+    after every tick, as {key: value code} dicts (memory/interning.py) that
+    are only decoded when written out. backend="json" keeps them in RAM until save();
+    backend="mmap" spills them to logs/snapshots/{local,global_tracker}/ as
+    the run proceeds (see memory/snapshot_store.py); backend="jsonl" streams
+    them to logs/{local_memories,global_memories_tracker}.jsonl.
+
+    After track_digests() every snapshot also records [local digest,
+    projection digest] (memory/digest.py) to logs/snapshot_digests.json, so
+    the validator can skip comparing states whose digests agree.
+    """
+    DIGESTS = "snapshot_digests.json"
+
+    def __init__(self, ontology_path, backend="json", out_dir="logs", **store_opts):
         with open(ontology_path, "r") as f:
             self.ontology_access = json.load(f)
+        self.region_access = load_region_access(os.path.dirname(ontology_path))
+        self.backend = backend
+        self.digests = None
         self.local_snapshots = defaultdict(list)
         self.global_snapshots = defaultdict(list)
+        if backend == "mmap":
+            from memory.snapshot_store import SnapshotWriter
+            snap_dir = os.path.join(out_dir, "snapshots")
+            self.local_snapshots = SnapshotWriter(os.path.join(snap_dir, "local"), **store_opts)
+            self.global_snapshots = SnapshotWriter(os.path.join(snap_dir, "global_tracker"), **store_opts)
+        elif backend == "jsonl":
+            from memory.jsonl_store import JsonlWriter
+            self.local_snapshots = JsonlWriter(os.path.join(out_dir, "local_memories.jsonl"), codes=True)
+            self.global_snapshots = JsonlWriter(os.path.join(out_dir, "global_memories_tracker.jsonl"), codes=True)
+        elif backend != "json":
+            raise ValueError(f"Unknown snapshot backend: {backend}")
+
+    def track_digests(self):
+        if self.digests is None:
+            self.digests = defaultdict(list)
 
     def snapshot(self, agents, global_memory):
+        """global_memory is a {key: value code} dict."""
+        sums = SliceDigests.from_state(global_memory) if self.digests is not None else None
         for agent in agents:
             agent_id = agent.agent_id
-            self.local_snapshots[agent_id].append(agent.memory.all_state())
-            proj = {
-                k: v for k, v in global_memory.items()
-                if k.split("@")[0] in self.ontology_access.get(agent_id, [])
-            }
-            self.global_snapshots[agent_id].append(proj)
+            regions = self.region_access.get(agent_id)
+            if sums is not None:
+                local = agent.memory.rolling_digest
+                if local is None:
+                    local = state_digest(agent.memory.state)
+                self.digests[agent_id].append(
+                    [local, sums.digest(self.ontology_access.get(agent_id, []), regions)])
+            if regions:
+                allowed = self.ontology_access.get(agent_id, [])
+                proj = {k: v for k, v in global_memory.items() if key_in_scope(k, allowed, regions)}
+            else:
+                proj = {
+                    k: v for k, v in global_memory.items()
+                    if k.split("@")[0] in self.ontology_access.get(agent_id, [])
+                }
+            if self.backend == "json":
+                self.local_snapshots[agent_id].append(agent.memory.codes())
+                self.global_snapshots[agent_id].append(proj)
+            else:
+                self.local_snapshots.append(agent_id, agent.memory.codes())
+                self.global_snapshots.append(agent_id, proj)
+
+    def rewind(self):
+        """Truncate spilled snapshots back to this tracker's cursors (on resume)."""
+        if self.backend != "json":
+            self.local_snapshots.rewind()
+            self.global_snapshots.rewind()
 
     def save(self, out_dir="logs"):
+        digests_path = os.path.join(out_dir, self.DIGESTS)
+        if self.digests is not None:
+            with open(digests_path, "w") as f:
+                json.dump(self.digests, f)
+        elif os.path.exists(digests_path):
+            os.remove(digests_path)
+        if self.backend != "json":
+            self.local_snapshots.close()
+            self.global_snapshots.close()
+            return
+        from memory.interning import VALUES
         os.makedirs(out_dir, exist_ok=True)
-        with open(os.path.join(out_dir, "local_memories.json"), "w") as f:
-            json.dump(self.local_snapshots, f, indent=2)
-        with open(os.path.join(out_dir, "global_memories_tracker.json"), "w") as f:
-            json.dump(self.global_snapshots, f, indent=2)
+        for name, snapshots in (("local_memories.json", self.local_snapshots),
+                                ("global_memories_tracker.json", self.global_snapshots)):
+            decoded = {agent_id: [VALUES.decode_state(s) for s in states]
+                       for agent_id, states in snapshots.items()}
+            with open(os.path.join(out_dir, name), "w") as f:
+                json.dump(decoded, f, indent=2)
 
 
 def combine_proposal_logs(log_dir="logs"):
@@ -40,13 +118,29 @@ def combine_proposal_logs(log_dir="logs"):
         json.dump(combined, f, indent=2)
 
 
+def open_snapshots(path):
+    """Snapshot directory (mmap backend) -> SnapshotReader; JSON or JSON-lines file -> dict."""
+    if os.path.isdir(path):
+        from memory.snapshot_store import SnapshotReader
+        return SnapshotReader(path)
+    return load_artifact(path)
+
+
+def load_snapshots(path):
+    """{agent: [state, ...]} from either format; snapshot dirs decode lazily."""
+    snapshots = open_snapshots(path)
+    return snapshots if isinstance(snapshots, dict) else snapshots.as_dict()
+
+
 def load_ontology_slice(agent_id, ontology_path):
     with open(ontology_path, "r") as f:
         ontology_access = json.load(f)
     return set(ontology_access.get(agent_id, []))
 
 
-def project_memory(memory, ontology_slice):
+def project_memory(memory, ontology_slice, regions=None):
+    if regions:
+        return {k: v for k, v in memory.items() if key_in_scope(k, ontology_slice, regions)}
     return {k: v for k, v in memory.items() if k.split("@")[0] in ontology_slice}
 
 def equal_slice(local, projected):
@@ -57,53 +151,135 @@ def equal_slice(local, projected):
     return all(projected.get(k) == v for k, v in local.items())
 
 
-def validate_stuttering_bisim(local_memory_log, global_memory_log, ontology_path, max_delay=3):
-    with open(local_memory_log, "r") as f:
-        local_snapshots = json.load(f)
-    with open(global_memory_log, "r") as f:
-        global_snapshots = json.load(f)
+def _stuttering_bisim_arrays(local, global_, ontology_path, max_delay, horizon=25):
+    """
+    validate_stuttering_bisim on two SnapshotReaders sharing one value table:
+    the forward-subset check becomes an integer compare over memmap views.
+    """
+    import numpy as np
+
+    violations = 0
+    total = 0
+    region_access = load_region_access(os.path.dirname(ontology_path))
+    for agent_id in local.agents:
+        slice_keys = load_ontology_slice(agent_id, ontology_path)
+        regions = region_access.get(agent_id)
+        local_keys = local.keys(agent_id)
+        total += local.meta[agent_id]["rows"]
+        in_slice = np.array([key_in_scope(k, slice_keys, regions) for k in local_keys], dtype=bool)
+        L = local.states(agent_id, 0, horizon)[:, :len(local_keys)]
+        L = np.where(in_slice, L, 0)
+
+        G = global_.states(agent_id) if agent_id in global_.meta else np.zeros((0, 0), dtype=L.dtype)
+        global_cols = {k: c for c, k in enumerate(global_.keys(agent_id))} if agent_id in global_.meta else {}
+        cols = np.array([global_cols.get(k, -1) for k in local_keys], dtype=np.int64)
+
+        matched = np.zeros(len(L), dtype=bool)
+        for dt in range(max_delay + 1):
+            rows = np.arange(len(L)) + dt
+            valid = rows < len(G)
+            aligned = np.full(L.shape, -1, dtype=np.int64)
+            if valid.any() and len(cols):
+                picked = G[rows[valid]][:, np.clip(cols, 0, None)]
+                aligned[valid] = np.where(cols >= 0, picked, -1)
+            matched |= valid & ((L == 0) | (L == aligned)).all(axis=1)
+
+        missed = np.flatnonzero(~matched)
+        if len(missed) and violations == 0:
+            print("\nFirst mismatch:", "agent", agent_id, "time-step", int(missed[0]))
+        violations += len(missed)
+
+    return {
+        "agents_tested": len(local.agents),
+        "violations": int(violations),
+        "score": round(1 - violations / max(1, total), 3),
+    }
+
+
+def load_digests(log_dir="logs"):
+    """{agent: [[local digest, projection digest], ...]} from snapshot_digests.json, or {}."""
+    path = os.path.join(log_dir, MemorySnapshotTracker.DIGESTS)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def validate_stuttering_bisim(local_memory_log, global_memory_log, ontology_path, max_delay=3, digests=None):
+    """
+    With `digests` (load_digests()) each (local state, projection) pair is
+    compared once per distinct pair of digests: states repeat from tick to
+    tick, and a repeat reuses the earlier result instead of comparing again.
+    """
+    local_snapshots = open_snapshots(local_memory_log)
+    global_snapshots = open_snapshots(global_memory_log)
     print(max_delay)
+    if not isinstance(local_snapshots, dict):
+        if not isinstance(global_snapshots, dict) and local_snapshots.values == global_snapshots.values:
+            return _stuttering_bisim_arrays(local_snapshots, global_snapshots, ontology_path, max_delay)
+        local_snapshots = local_snapshots.as_dict()
+    if not isinstance(global_snapshots, dict):
+        global_snapshots = global_snapshots.as_dict()
     violations = []
+    digest_hits = 0
+    region_access = load_region_access(os.path.dirname(ontology_path))
     for agent_id, agent_memory in local_snapshots.items():
         slice_keys = load_ontology_slice(agent_id, ontology_path)
+        regions = region_access.get(agent_id)
         local_trace = agent_memory
         global_trace = global_snapshots.get(agent_id, [])
+        pairs = (digests or {}).get(agent_id)
+        if pairs is not None and not len(pairs) == len(local_trace) == len(global_trace):
+            pairs = None   # digests of another run
+        compared = {}      # (local digest, projection digest) -> forward-subset result
         
         for t, local_state in enumerate(local_trace):
             if t > 24:
                 continue
-            local_proj = {k: v for k, v in local_state.items()
-                        if k.split("@")[0] in slice_keys}
+            local_proj = None
 
             match_found = False
             for dt in range(max_delay + 1):
                 if t + dt < len(global_trace):
-                    projected = project_memory(global_trace[t + dt], slice_keys)
-                    if equal_slice(local_proj, projected):
+                    pair = (pairs[t][0], pairs[t + dt][1]) if pairs is not None else None
+                    matched = compared.get(pair) if pair is not None else None
+                    if matched is None:
+                        if local_proj is None:
+                            local_proj = project_memory(local_state, slice_keys, regions)
+                        projected = project_memory(global_trace[t + dt], slice_keys, regions)
+                        matched = equal_slice(local_proj, projected)
+                        if pair is not None:
+                            compared[pair] = matched
+                    else:
+                        digest_hits += 1
+                    if matched:
                         match_found = True
                         break
 
             if not match_found:
                 if len(violations) == 0:
+                    last = min(t + max_delay, len(global_trace) - 1)
+                    projected = project_memory(global_trace[last], slice_keys, regions) if last >= 0 else {}
                     print("\nFirst mismatch:",
                         "agent", agent_id, "time-step", t)
-                    print("  local slice :", local_proj)
+                    print("  local slice :", project_memory(local_state, slice_keys, regions))
                     print("  global slice:", projected)
                     print("  slice keys  :", sorted(slice_keys)[:8], "...")
                 violations.append({"agent": agent_id, "tick": t})
 
-    return {
+    result = {
         "agents_tested": len(local_snapshots),
         "violations": len(violations),
         "score": round(1 - len(violations) / max(1, sum(len(v) for v in local_snapshots.values())), 3),
     }
+    if digests:
+        result["digest_skips"] = digest_hits
+    return result
 
 
 def validate_probabilistic_bisim(distribution_log_path, global_log_path):
-    with open(distribution_log_path, "r") as f:
-        local_distributions = json.load(f)
-    with open(global_log_path, "r") as f:
-        global_updates = json.load(f)
+    local_distributions = load_artifact(distribution_log_path)
+    global_updates = load_snapshots(global_log_path)
 
     mismatch_count = 0
     total_samples = 0
@@ -134,11 +310,37 @@ def validate_probabilistic_bisim(distribution_log_path, global_log_path):
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshots", default=None,
+                        help="Read the mmap snapshot store in this directory (e.g. logs/snapshots) instead of the JSON files.")
+    args = parser.parse_args()
+    if args.snapshots:
+        local_path = os.path.join(args.snapshots, "local")
+        tracker_path = os.path.join(args.snapshots, "global_tracker")
+        canonical_path = os.path.join(args.snapshots, "global_canonical")
+    else:
+        # .jsonl when the run streamed its outputs (output.format = "jsonl")
+        local_path = artifact_path("logs", "local_memories")
+        tracker_path = artifact_path("logs", "global_memories_tracker")
+        canonical_path = artifact_path("logs", "global_memories_canonical")
+
+    if os.path.exists("logs/evictions.json"):
+        # Bounded memories: an evicted key is no longer held, so it is not compared
+        with open("logs/evictions.json") as f:
+            evictions = json.load(f)
+        print(f"Evictions: {sum(evictions.values())} keys across {len(evictions)} agents "
+              "(evicted keys count as aligned)")
+
     print("Testing Theorem 5(Stuttering Bisimulation)...")
-    result1 = validate_stuttering_bisim("logs/local_memories.json", "logs/global_memories_tracker.json", "logs/ontology_access.json", max_delay=30)
+    result1 = validate_stuttering_bisim(local_path, tracker_path, "logs/ontology_access.json", max_delay=30,
+                                        digests=load_digests("logs"))
     print(json.dumps(result1, indent=2))
 
-    combine_proposal_logs("logs")
+    proposals_path = "logs/proposal_distributions.jsonl"
+    if not os.path.exists(proposals_path):
+        # Per-agent proposals_*.json files from a JSON-format run
+        combine_proposal_logs("logs")
+        proposals_path = "logs/proposal_distributions.json"
     print("\nTesting Theorem 7 (Probabilistic Bisimulation)...")
-    result2 = validate_probabilistic_bisim("logs/proposal_distributions.json", "logs/global_memories_canonical.json")
+    result2 = validate_probabilistic_bisim(proposals_path, canonical_path)
     print(json.dumps(result2, indent=2))
\ No newline at end of file